@@ -1,19 +1,37 @@
 """Demo CLI interface for the Financial News Intelligence System."""
-import json
+import functools
 import sys
 from src.agents.orchestrator import NewsProcessingOrchestrator
 from src.services.query_service import QueryService
 from src.database.init_db import init_database
 from src.database.db_session import get_db
 from src.database.models import NewsArticle, Entity, StockImpact
-from src.services.ingestion_service import NewsIngestionService
+from src.services.ingestion_service import NewsIngestionService, load_mock_articles
 from datetime import datetime
 
 
+@functools.cache
+def get_orchestrator():
+    """Get the shared orchestrator (models are loaded once per process)."""
+    return NewsProcessingOrchestrator()
+
+
+@functools.cache
+def get_query_service():
+    """Get the shared query service."""
+    return QueryService()
+
+
+@functools.cache
 def load_mock_data():
     """Load mock news data."""
-    with open("data/mock_news.json", "r") as f:
-        return json.load(f)
+    return load_mock_articles()
+
+
+@functools.cache
+def get_pipeline_result():
+    """Process the mock data once and share the result across demos."""
+    return get_orchestrator().process_articles(load_mock_data())
 
 
 def print_separator():
@@ -36,8 +54,7 @@ def demo_deduplication():
     print("Article N6: 'Central bank raises policy rate 25bps, signals hawkish stance'")
     print("Article N9: 'RBI increases repo rate by 25 basis points to combat inflation'")
     
-    orchestrator = NewsProcessingOrchestrator()
-    result = orchestrator.process_articles(articles)
+    result = get_pipeline_result()
     
     print("\n\nDeduplication Results:")
     print(f"Total articles processed: {len(articles)}")
@@ -65,7 +82,7 @@ def demo_entity_extraction():
     print(f"Sample Article: {sample_article['title']}")
     print(f"Content: {sample_article['content'][:200]}...")
     
-    orchestrator = NewsProcessingOrchestrator()
+    orchestrator = get_orchestrator()
     result = orchestrator.process_articles([sample_article])
     
     entities = result.get('extracted_entities', {}).get(sample_article['id'], {})
@@ -92,14 +109,13 @@ def demo_query_system():
     
     articles = load_mock_data()
     
-    # Process all articles
-    orchestrator = NewsProcessingOrchestrator()
-    result = orchestrator.process_articles(articles)
+    # Reuse the shared pipeline result
+    result = get_pipeline_result()
     
     # Build stock impacts mapping
     stock_impacts_db = result.get('stock_impacts', {})
     
-    query_service = QueryService()
+    query_service = get_query_service()
     
     # Test queries
     test_queries = [
@@ -146,8 +162,7 @@ def demo_full_pipeline():
     articles = load_mock_data()
     print(f"Loading {len(articles)} articles from mock data...")
     
-    orchestrator = NewsProcessingOrchestrator()
-    result = orchestrator.process_articles(articles)
+    result = get_pipeline_result()
     
     print(f"\nProcessing complete!")
     print(f"  - Unique stories: {len(result.get('unique_stories', {}))}")
@@ -184,11 +199,10 @@ def interactive_query():
     print_separator()
     
     articles = load_mock_data()
-    orchestrator = NewsProcessingOrchestrator()
-    result = orchestrator.process_articles(articles)
+    result = get_pipeline_result()
     stock_impacts_db = result.get('stock_impacts', {})
     
-    query_service = QueryService()
+    query_service = get_query_service()
     
     while True:
         query = input("\nEnter your query: ").strip()
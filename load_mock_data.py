@@ -1,21 +1,41 @@
 """Script to load mock news data into the database."""
-import json
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
 from datetime import datetime
+from sqlalchemy import insert, text
 from src.database.init_db import init_database
 from src.database.db_session import get_db
 from src.database.models import NewsArticle, Entity, StockImpact
 from src.agents.orchestrator import NewsProcessingOrchestrator
+from src.services.ingestion_service import load_mock_articles
 
-def _parse_datetime(date_str):
-    """Parse datetime string, handling Z suffix."""
-    if not date_str:
-        return datetime.utcnow()
+def _parse_datetimes(date_strs):
+    """Parse datetime strings in one vectorized pass, handling Z suffix."""
     # Replace Z with +00:00 for ISO format
-    date_str = date_str.replace('Z', '+00:00')
+    normalized = np.char.replace(np.array([d or '' for d in date_strs], dtype=str), 'Z', '+00:00')
+    parsed = pd.to_datetime(normalized, errors='coerce', utc=True, format='ISO8601')
+    
+    now = datetime.utcnow()
+    return [now if pd.isna(ts) else ts.to_pydatetime() for ts in parsed]
+
+@contextmanager
+def _sqlite_sync_off(db):
+    """
+    Skip fsyncs for the save transaction on SQLite, then restore NORMAL so
+    the pooled connection goes back with the durability db_session sets.
+    """
+    if db.bind.dialect.name != 'sqlite':
+        yield
+        return
+    
+    db.execute(text("PRAGMA synchronous=OFF"))
     try:
-        return datetime.fromisoformat(date_str)
-    except:
-        return datetime.utcnow()
+        yield
+    finally:
+        # SQLite can't change the level inside a transaction, so end any failed one first
+        db.rollback()
+        db.execute(text("PRAGMA synchronous=NORMAL"))
 
 def load_mock_data():
     """Load mock news data and process it."""
@@ -23,8 +43,7 @@ def load_mock_data():
     init_database()
     
     print("Loading mock news data...")
-    with open("data/mock_news.json", "r") as f:
-        articles = json.load(f)
+    articles = load_mock_articles()
     
     print(f"Processing {len(articles)} articles through the pipeline...")
     orchestrator = NewsProcessingOrchestrator()
@@ -37,88 +56,93 @@ def load_mock_data():
     print(f"  - Articles with stock impacts: {len(result.get('stock_impacts', {}))}")
     
     print("\nSaving to database...")
-    with get_db() as db:
+    with get_db() as db, _sqlite_sync_off(db):
+        # Fetch all existing article IDs and their primary keys in one query
+        db_ids = dict(db.query(NewsArticle.article_id, NewsArticle.id).all())
+        existing_ids = set(db_ids)
+        
         # Save unique stories
-        for story_id, story_data in result.get('unique_stories', {}).items():
-            existing = db.query(NewsArticle).filter(
-                NewsArticle.article_id == story_id
-            ).first()
-            
-            if not existing:
-                story = NewsArticle(
-                    article_id=story_id,
-                    title=story_data.get('consolidated_title', ''),
-                    content=story_data.get('consolidated_content', ''),
-                    source=','.join(story_data.get('sources', [])),
-                    published_at=_parse_datetime(story_data.get('published_at', datetime.utcnow().isoformat())),
-                    url=story_data.get('url'),
-                    is_duplicate=0
-                )
-                db.add(story)
+        stories = result.get('unique_stories', {})
+        story_dates = _parse_datetimes([s.get('published_at') for s in stories.values()])
+        new_stories = [
+            NewsArticle(
+                article_id=story_id,
+                title=story_data.get('consolidated_title', ''),
+                content=story_data.get('consolidated_content', ''),
+                source=','.join(story_data.get('sources', [])),
+                published_at=published_at,
+                url=story_data.get('url'),
+                is_duplicate=0
+            )
+            for (story_id, story_data), published_at in zip(stories.items(), story_dates)
+            if story_id not in existing_ids
+        ]
+        db.bulk_save_objects(new_stories, return_defaults=True)
+        existing_ids.update(story.article_id for story in new_stories)
+        db_ids.update((story.article_id, story.id) for story in new_stories)
         
-        # Save all articles
-        for article in articles:
-            # Check if article already exists
-            existing = db.query(NewsArticle).filter(
-                NewsArticle.article_id == article['id']
-            ).first()
+        # Map every grouped article to its unique story in one pass
+        dup_to_unique = {
+            dup_id: unique_id
+            for unique_id, dup_ids in result.get('duplicates', {}).items()
+            for dup_id in dup_ids
+        }
+        
+        # Save all articles not stored yet
+        new_articles = []
+        article_dates = _parse_datetimes([a.get('published_at') for a in articles])
+        for article, published_at in zip(articles, article_dates):
+            if article['id'] in existing_ids:
+                continue
             
-            if existing:
-                news_article = existing
-            else:
-                # Check if this is a duplicate
-                is_duplicate = 0
-                duplicate_of = None
-                
-                for unique_id, duplicate_ids in result.get('duplicates', {}).items():
-                    if article['id'] in duplicate_ids and article['id'] != unique_id:
-                        is_duplicate = 1
-                        # Find the unique article
-                        unique_article = db.query(NewsArticle).filter(
-                            NewsArticle.article_id == unique_id
-                        ).first()
-                        if unique_article:
-                            duplicate_of = unique_article.id
-                        break
-                
-                # Save article
-                news_article = NewsArticle(
-                    article_id=article['id'],
-                    title=article.get('title', ''),
-                    content=article.get('content', ''),
-                    source=article.get('source'),
-                    published_at=_parse_datetime(article.get('published_at', datetime.utcnow().isoformat())),
-                    url=article.get('url'),
-                    is_duplicate=is_duplicate,
-                    duplicate_of=duplicate_of
-                )
-                db.add(news_article)
-                db.flush()
+            # Check if this is a duplicate
+            unique_id = dup_to_unique.get(article['id'])
+            is_duplicate = 1 if unique_id and unique_id != article['id'] else 0
+            duplicate_of = db_ids.get(unique_id) if is_duplicate else None
             
-            # Save entities (only if not already saved)
-            if not existing:
-                entities = result.get('extracted_entities', {}).get(article['id'], {})
-                for entity_type, entity_list in entities.items():
-                    for entity in entity_list:
-                        entity_obj = Entity(
-                            article_id=news_article.id,
-                            entity_type=entity_type,
-                            entity_name=entity.get('name', ''),
-                            confidence=entity.get('confidence', 1.0)
-                        )
-                        db.add(entity_obj)
-                
-                # Save stock impacts
-                impacts = result.get('stock_impacts', {}).get(article['id'], [])
-                for impact in impacts:
-                    impact_obj = StockImpact(
-                        article_id=news_article.id,
-                        symbol=impact.get('symbol', ''),
-                        confidence=impact.get('confidence', 0.0),
-                        impact_type=impact.get('impact_type', ''),
-                        reasoning=impact.get('reasoning', '')
-                    )
-                    db.add(impact_obj)
+            new_articles.append(NewsArticle(
+                article_id=article['id'],
+                title=article.get('title', ''),
+                content=article.get('content', ''),
+                source=article.get('source'),
+                published_at=published_at,
+                url=article.get('url'),
+                is_duplicate=is_duplicate,
+                duplicate_of=duplicate_of
+            ))
+            existing_ids.add(article['id'])
+        
+        db.bulk_save_objects(new_articles, return_defaults=True)
+        
+        # Save entities and stock impacts for every newly stored row
+        entity_rows = []
+        impact_rows = []
+        for news_article in new_stories + new_articles:
+            entities = result.get('extracted_entities', {}).get(news_article.article_id, {})
+            for entity_type, entity_list in entities.items():
+                for entity in entity_list:
+                    entity_rows.append({
+                        'article_id': news_article.id,
+                        'entity_type': entity_type,
+                        'entity_name': entity.get('name', ''),
+                        'confidence': entity.get('confidence', 1.0)
+                    })
+            
+            impacts = result.get('stock_impacts', {}).get(news_article.article_id, [])
+            for impact in impacts:
+                impact_rows.append({
+                    'article_id': news_article.id,
+                    'symbol': impact.get('symbol', ''),
+                    'confidence': impact.get('confidence', 0.0),
+                    'impact_type': impact.get('impact_type', ''),
+                    'reasoning': impact.get('reasoning', '')
+                })
+        
+        # Core executemany inserts skip the ORM unit of work entirely
+        if entity_rows:
+            db.execute(insert(Entity), entity_rows)
+        if impact_rows:
+            db.execute(insert(StockImpact), impact_rows)
         
         db.commit()
     
@@ -2,6 +2,8 @@
 from typing import TypedDict, Annotated
 from langgraph.graph import StateGraph, END
 from src.services.deduplication_service import DeduplicationService
+from src.services.semantic_cache import SemanticCache
+from src.utils.embeddings import get_embeddings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,6 +21,8 @@ class DeduplicationAgent:
     
     def __init__(self):
         self.service = DeduplicationService()
+        self.cache = SemanticCache()
+        self._graph = None
     
     def identify_duplicates(self, state: DeduplicationState) -> DeduplicationState:
         """Identify duplicate articles."""
@@ -26,13 +30,23 @@ class DeduplicationAgent:
         
         logger.info(f"Deduplication agent processing {len(articles)} articles")
         
-        # Identify duplicates
-        duplicates = self.service.identify_duplicates(articles)
+        # Articles seen in earlier batches skip the similarity search
+        cached_hits, to_process = self._split_cached(articles)
+        
+        # Identify duplicates among the remaining articles
+        vectors = {}
+        duplicates = self.service.identify_duplicates(to_process, vectors)
+        self._cache_results(to_process, duplicates, vectors)
+        
+        if cached_hits:
+            logger.info(f"Semantic cache hits: {len(cached_hits)}/{len(articles)}")
+            duplicates = self._merge_cached_hits(articles, duplicates, cached_hits)
         
         # Consolidate stories
         unique_stories = {}
+        article_dict = {a['id']: a for a in articles}
         for unique_id, duplicate_ids in duplicates.items():
-            consolidated = self.service.consolidate_story(duplicate_ids, articles)
+            consolidated = self.service.consolidate_story(duplicate_ids, articles, article_dict)
             if consolidated:
                 unique_stories[unique_id] = consolidated
         
@@ -42,6 +56,85 @@ class DeduplicationAgent:
             'duplicates': duplicates
         }
     
+    def _split_cached(self, articles: list) -> tuple:
+        """Split articles into cache hits (article_id -> unique_id) and misses."""
+        cached_hits = {}
+        misses = []
+        
+        for article in articles:
+            unique_id = self.cache.get(article)
+            if unique_id is None:
+                misses.append(article)
+            else:
+                cached_hits[article['id']] = unique_id
+        
+        if not misses or not len(self.cache):
+            return cached_hits, misses
+        
+        texts = [f"{a.get('title', '')} {a.get('content', '')}" for a in misses]
+        vectors = get_embeddings(texts)
+        to_process = []
+        for article, vector, unique_id in zip(misses, vectors, self.cache.lookup_similar(misses, vectors)):
+            if unique_id is None:
+                to_process.append(article)
+            else:
+                cached_hits[article['id']] = unique_id
+                self.cache.put(article, unique_id, vector=vector)
+        
+        return cached_hits, to_process
+    
+    def _cache_results(self, articles: list, duplicates: dict, vectors: dict):
+        """Remember the unique story assigned to each freshly processed article."""
+        article_dict = {a['id']: a for a in articles}
+        for unique_id, duplicate_ids in duplicates.items():
+            for article_id in duplicate_ids:
+                if article_id in article_dict:
+                    self.cache.put(article_dict[article_id], unique_id, vector=vectors.get(article_id))
+    
+    def _merge_cached_hits(self, articles: list, duplicates: dict, cached_hits: dict) -> dict:
+        """
+        Merge cache hits into the duplicate groups, keeping article order.
+        
+        A hit only joins a group whose unique article is in this batch. A
+        story from an earlier batch is represented by the first of its
+        articles in this batch instead, so every key is an ID of this batch.
+        """
+        batch_ids = {a['id'] for a in articles}
+        assignments = {}
+        for unique_id, duplicate_ids in duplicates.items():
+            for article_id in duplicate_ids:
+                assignments[article_id] = unique_id
+        
+        # earlier batch's unique ID -> its representative in this batch
+        representatives = {}
+        for article in articles:
+            unique_id = cached_hits.get(article['id'])
+            if unique_id is None:
+                continue
+            if unique_id in batch_ids:
+                assignments[article['id']] = assignments.get(unique_id, unique_id)
+            else:
+                assignments[article['id']] = representatives.setdefault(unique_id, article['id'])
+        
+        merged = {}
+        for article in articles:
+            unique_id = assignments.get(article['id'], article['id'])
+            merged.setdefault(unique_id, []).append(article['id'])
+        
+        # The unique article always leads its group
+        for unique_id, duplicate_ids in merged.items():
+            if unique_id in duplicate_ids and duplicate_ids[0] != unique_id:
+                duplicate_ids.remove(unique_id)
+                duplicate_ids.insert(0, unique_id)
+        
+        return merged
+    
+    def get_graph(self):
+        """Return the compiled deduplication graph, building it on first use."""
+        if self._graph is None:
+            self._graph = self.build_graph()
+        return self._graph
+    
     def build_graph(self) -> StateGraph:
         """Build the LangGraph for deduplication."""
         workflow = StateGraph(DeduplicationState)
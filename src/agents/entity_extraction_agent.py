@@ -1,11 +1,32 @@
 """Entity extraction agent using LangGraph."""
-from typing import TypedDict, Annotated
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import TypedDict, Annotated, List, Dict
 from langgraph.graph import StateGraph, END
-from src.services.entity_extraction_service import EntityExtractionService
+from src.services.entity_extraction_service import EntityExtractionService, NER_BATCH_SIZE
 import logging
 
 logger = logging.getLogger(__name__)
 
+PARALLEL_MIN_ARTICLES = 64  # Smaller batches run in-process; worker startup isn't worth it
+
+# Service instance owned by each pool worker, created once by _init_worker
+_worker_service = None
+
+
+def _init_worker():
+    """Create the extraction service once per worker process."""
+    global _worker_service
+    _worker_service = EntityExtractionService()
+
+
+def _extract_chunk(chunk: List[tuple]) -> List[Dict]:
+    """Extract entities for a chunk of (content, title) pairs in a worker."""
+    contents, titles = zip(*chunk)
+    return _worker_service.extract_entities_batch(list(contents), list(titles))
+
 
 class EntityExtractionState(TypedDict):
     """State for entity extraction agent."""
@@ -18,26 +39,68 @@ class EntityExtractionAgent:
     
     def __init__(self):
         self.service = EntityExtractionService()
+        self._graph = None
+        self._pool = None
     
     def extract_entities(self, state: EntityExtractionState) -> EntityExtractionState:
         """Extract entities from articles."""
         articles = state.get('articles', [])
-        extracted_entities = {}
         
         logger.info(f"Entity extraction agent processing {len(articles)} articles")
         
-        for article in articles:
-            title = article.get('title', '')
-            content = article.get('content', '')
-            
-            entities = self.service.extract_entities(content, title)
-            extracted_entities[article['id']] = entities
+        # Run NER in batches, spread over worker processes for large inputs
+        titles = [article.get('title', '') for article in articles]
+        contents = [article.get('content', '') for article in articles]
+        if len(articles) >= PARALLEL_MIN_ARTICLES and (os.cpu_count() or 1) > 1:
+            results = self._extract_parallel(contents, titles)
+        else:
+            results = self.service.extract_entities_batch(contents, titles)
+        
+        extracted_entities = {
+            article['id']: entities
+            for article, entities in zip(articles, results)
+        }
         
         return {
             'articles': articles,
             'extracted_entities': extracted_entities
         }
     
+    def _extract_parallel(self, contents: List[str], titles: List[str]) -> List[Dict]:
+        """Spread batched extraction over a process pool, one NER batch per task."""
+        if self._pool is None:
+            # Spawned, not forked: the parent already holds torch, numba and
+            # hyperscan state and embedding locks that a fork would copy
+            self._pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+            atexit.register(self.close)
+        
+        pairs = list(zip(contents, titles))
+        chunks = [
+            pairs[i:i + NER_BATCH_SIZE]
+            for i in range(0, len(pairs), NER_BATCH_SIZE)
+        ]
+        
+        results = []
+        for chunk_results in self._pool.map(_extract_chunk, chunks):
+            results.extend(chunk_results)
+        return results
+    
+    def close(self):
+        """Shut down the worker pool, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+    
+    def get_graph(self):
+        """Return the compiled entity extraction graph, building it on first use."""
+        if self._graph is None:
+            self._graph = self.build_graph()
+        return self._graph
+    
     def build_graph(self) -> StateGraph:
         """Build the LangGraph for entity extraction."""
         workflow = StateGraph(EntityExtractionState)
@@ -19,6 +19,7 @@ class ImpactMappingAgent:
     
     def __init__(self):
         self.service = ImpactMappingService()
+        self._graph = None
     
     def map_impacts(self, state: ImpactMappingState) -> ImpactMappingState:
         """Map entities to stock impacts."""
@@ -41,6 +42,12 @@ class ImpactMappingAgent:
             'stock_impacts': stock_impacts
         }
     
+    def get_graph(self):
+        """Return the compiled impact mapping graph, building it on first use."""
+        if self._graph is None:
+            self._graph = self.build_graph()
+        return self._graph
+    
     def build_graph(self) -> StateGraph:
         """Build the LangGraph for impact mapping."""
         workflow = StateGraph(ImpactMappingState)
@@ -1,4 +1,5 @@
 """Main orchestrator for multi-agent system using LangGraph."""
+import asyncio
 from typing import TypedDict, Annotated
 from langgraph.graph import StateGraph, END
 from src.agents.deduplication_agent import DeduplicationAgent
@@ -17,15 +18,22 @@ class ProcessingState(TypedDict):
     extracted_entities: dict
     stock_impacts: dict
     processed_articles: list
+    _story_articles: list  # Consolidated stories as articles, built by deduplicate
 
 
 class NewsProcessingOrchestrator:
-    """Main orchestrator that coordinates all agents."""
+    """
+    Main orchestrator that coordinates all agents.
+    
+    Each node updates the state dict in place and returns it; process_articles
+    owns that dict for the duration of a run.
+    """
     
     def __init__(self):
         self.dedup_agent = DeduplicationAgent()
         self.entity_agent = EntityExtractionAgent()
         self.impact_agent = ImpactMappingAgent()
+        self._graph = None
     
     def deduplicate(self, state: ProcessingState) -> ProcessingState:
         """Run deduplication agent."""
@@ -34,71 +42,52 @@ class NewsProcessingOrchestrator:
         }
         result = self.dedup_agent.identify_duplicates(dedup_state)
         
-        return {
-            **state,
-            'unique_stories': result.get('unique_stories', {}),
-            'duplicates': result.get('duplicates', {})
-        }
+        state['unique_stories'] = result.get('unique_stories', {})
+        state['duplicates'] = result.get('duplicates', {})
+        
+        # Article representation of each consolidated story, shared by the
+        # entity and impact nodes
+        state['_story_articles'] = [
+            {
+                'id': story_id,
+                'title': story_data.get('consolidated_title', ''),
+                'content': story_data.get('consolidated_content', '')
+            }
+            for story_id, story_data in state['unique_stories'].items()
+        ]
+        return state
     
     def extract_entities(self, state: ProcessingState) -> ProcessingState:
         """Run entity extraction agent."""
         # Use unique stories if available, otherwise use all articles
-        articles = state.get('articles', [])
-        unique_stories = state.get('unique_stories', {})
+        articles_to_process = state.get('_story_articles') or state.get('articles', [])
         
-        # Process unique stories
-        if unique_stories:
-            story_articles = []
-            for story_id, story_data in unique_stories.items():
-                # Create article representation from consolidated story
-                story_articles.append({
-                    'id': story_id,
-                    'title': story_data.get('consolidated_title', ''),
-                    'content': story_data.get('consolidated_content', '')
-                })
-            articles_to_process = story_articles
-        else:
-            articles_to_process = articles
+        # One call for the whole batch keeps NER and pattern scans batched
+        result = self.entity_agent.extract_entities({'articles': articles_to_process})
         
-        entity_state = {
-            'articles': articles_to_process
-        }
-        result = self.entity_agent.extract_entities(entity_state)
-        
-        return {
-            **state,
-            'extracted_entities': result.get('extracted_entities', {})
-        }
+        state['extracted_entities'] = result.get('extracted_entities', {})
+        return state
     
     def map_impacts(self, state: ProcessingState) -> ProcessingState:
         """Run impact mapping agent."""
-        articles = state.get('articles', [])
-        unique_stories = state.get('unique_stories', {})
         extracted_entities = state.get('extracted_entities', {})
         
         # Use unique stories if available
-        if unique_stories:
-            story_articles = []
-            for story_id, story_data in unique_stories.items():
-                story_articles.append({
-                    'id': story_id,
-                    'title': story_data.get('consolidated_title', ''),
-                    'content': story_data.get('consolidated_content', '')
-                })
-            articles_to_process = story_articles
-        else:
-            articles_to_process = articles
+        articles_to_process = state.get('_story_articles') or state.get('articles', [])
         
-        impact_state = {
+        result = self.impact_agent.map_impacts({
             'articles': articles_to_process,
             'extracted_entities': extracted_entities
-        }
-        result = self.impact_agent.map_impacts(impact_state)
+        })
         
-        return {
-            **state,
-            'stock_impacts': result.get('stock_impacts', {})
-        }
+        state['stock_impacts'] = result.get('stock_impacts', {})
+        return state
+    
+    def get_graph(self):
+        """Return the compiled workflow graph, building it on first use."""
+        if self._graph is None:
+            self._graph = self.build_graph()
+        return self._graph
     
     def build_graph(self) -> StateGraph:
         """Build the main LangGraph workflow."""
@@ -118,7 +107,12 @@ class NewsProcessingOrchestrator:
         return workflow.compile()
     
     def process_articles(self, articles: list) -> dict:
-        """Process articles through the entire pipeline."""
+        """
+        Process articles through the entire pipeline.
+        
+        The nodes are called directly in graph order; the compiled graph from
+        get_graph() is kept for callers that want to drive it with LangGraph.
+        """
         initial_state = {
             'articles': articles,
             'unique_stories': {},
@@ -128,8 +122,13 @@ class NewsProcessingOrchestrator:
             'processed_articles': []
         }
         
-        graph = self.build_graph()
-        result = graph.invoke(initial_state)
+        state = self.deduplicate(initial_state)
+        state = self.extract_entities(state)
+        state = self.map_impacts(state)
+        state.pop('_story_articles', None)
         
-        return result
-
+        return state
+    
+    async def process_articles_async(self, articles: list) -> dict:
+        """Process articles through the entire pipeline without blocking the event loop."""
+        return await asyncio.to_thread(self.process_articles, articles)
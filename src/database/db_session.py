@@ -1,13 +1,47 @@
 """Database session management."""
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, Session
-from contextlib import contextmanager
+from contextlib import contextmanager, asynccontextmanager
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./financial_news.db")
-engine = create_engine(DATABASE_URL, echo=False)
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# Async driver for the same database, used by the API's read endpoints
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    .replace("postgresql://", "postgresql+asyncpg://", 1)
+)
+
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    # Pooled SQLite connections are shared with FastAPI background threads
+    connect_args={"check_same_thread": False} if IS_SQLITE else {}
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers run during writes; NORMAL sync is safe under WAL."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MB page cache
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB memory-mapped I/O
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+if IS_SQLITE:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
 
 @contextmanager
 def get_db():
@@ -23,6 +57,18 @@ def get_db():
         db.close()
 
 
+@asynccontextmanager
+async def get_async_db():
+    """Get async database session context manager."""
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
 def get_db_session() -> Session:
     """Get a database session."""
     return SessionLocal()
@@ -1,5 +1,5 @@
 """Database models for financial news storage."""
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, JSON, ForeignKey, Text
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, JSON, ForeignKey, Text, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
@@ -10,6 +10,10 @@ Base = declarative_base()
 class NewsArticle(Base):
     """Model for storing news articles."""
     __tablename__ = "news_articles"
+    __table_args__ = (
+        # Serves the is_duplicate == 0 filter used by /query and /stocks
+        Index('ix_article_dup_pub', 'is_duplicate', 'published_at'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     article_id = Column(String, unique=True, nullable=False, index=True)
@@ -25,7 +29,7 @@ class NewsArticle(Base):
     duplicate_of = Column(Integer, ForeignKey('news_articles.id'), nullable=True)
     similarity_score = Column(Float, nullable=True)
     
-    # Relationships
+    # Relationships (lazy by default; queries that read them use selectinload())
     entities = relationship("Entity", back_populates="article")
     stock_impacts = relationship("StockImpact", back_populates="article")
     duplicates = relationship("NewsArticle", remote_side=[id])
@@ -36,7 +40,7 @@ class Entity(Base):
     __tablename__ = "entities"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    article_id = Column(Integer, ForeignKey('news_articles.id'), nullable=False)
+    article_id = Column(Integer, ForeignKey('news_articles.id'), nullable=False, index=True)
     entity_type = Column(String, nullable=False)  # Company, Sector, Regulator, Person, Event
     entity_name = Column(String, nullable=False)
     confidence = Column(Float, default=1.0)
@@ -49,10 +53,14 @@ class Entity(Base):
 class StockImpact(Base):
     """Model for storing stock impact mappings."""
     __tablename__ = "stock_impacts"
+    __table_args__ = (
+        # Covers symbol lookups joined back to their articles
+        Index('ix_stock_impact_symbol_article', 'symbol', 'article_id'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    article_id = Column(Integer, ForeignKey('news_articles.id'), nullable=False)
-    symbol = Column(String, nullable=False, index=True)
+    article_id = Column(Integer, ForeignKey('news_articles.id'), nullable=False, index=True)
+    symbol = Column(String, nullable=False)
     confidence = Column(Float, nullable=False)  # 0.0 to 1.0
     impact_type = Column(String, nullable=False)  # direct, sector, regulatory
     reasoning = Column(Text)
@@ -69,14 +77,30 @@ class UniqueStory(Base):
     story_id = Column(String, unique=True, nullable=False)
     consolidated_title = Column(String, nullable=False)
     consolidated_content = Column(Text, nullable=False)
-    article_ids = Column(JSON, nullable=False)  # List of article IDs in this story
+    article_ids = Column(JSON, nullable=False)  # List of article IDs in this story (see StoryArticle)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
+    articles = relationship("StoryArticle", back_populates="story")
     entities = relationship("StoryEntity", back_populates="story")
     stock_impacts = relationship("StoryStockImpact", back_populates="story")
 
 
+class StoryArticle(Base):
+    """Model for story membership; the indexed form of UniqueStory.article_ids."""
+    __tablename__ = "story_articles"
+    __table_args__ = (
+        # Also serves lookups by story_id, as its leading column
+        UniqueConstraint('story_id', 'article_id', name='uq_story_article'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    story_id = Column(Integer, ForeignKey('unique_stories.id'), nullable=False)
+    article_id = Column(String, nullable=False, index=True)
+    
+    story = relationship("UniqueStory", back_populates="articles")
+
+
 class StoryEntity(Base):
     """Model for entities in unique stories."""
     __tablename__ = "story_entities"
@@ -0,0 +1,143 @@
+"""Similarity kernels for deduplication."""
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+INT8_SCALE = 127  # Largest component of each row maps to +/-127
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Return a contiguous float32 copy of vectors with L2-normalized rows."""
+    matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def quantize_rows(E: np.ndarray):
+    """
+    Quantize rows to int8 with a per-row scale.
+    
+    Each row is scaled so its largest component maps to 127, which keeps far
+    more resolution than a fixed scale for unit vectors with small components.
+    
+    Returns:
+        Tuple of (Q, scales) where E[i] ~= Q[i] * scales[i]
+    """
+    E = np.asarray(E, dtype=np.float32)
+    max_abs = np.abs(E).max(axis=1)
+    max_abs[max_abs == 0] = 1.0
+    scales = (max_abs / INT8_SCALE).astype(np.float32)
+    Q = np.rint(E / scales[:, None]).astype(np.int8)
+    return np.ascontiguousarray(Q), scales
+
+
+def _pairwise_cosine_topk_numpy(E: np.ndarray, k: int):
+    """NumPy fallback for pairwise_cosine_topk."""
+    similarities = E @ E.T
+    np.fill_diagonal(similarities, -2.0)
+    
+    top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    top_sims = np.take_along_axis(similarities, top, axis=1)
+    order = np.argsort(-top_sims, axis=1)
+    
+    return (
+        np.take_along_axis(top, order, axis=1).astype(np.int64),
+        np.take_along_axis(top_sims, order, axis=1).astype(np.float32)
+    )
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _pairwise_cosine_topk_jit(E, k):
+        n, dim = E.shape
+        top_idx = np.full((n, k), -1, dtype=np.int64)
+        # Cosine is >= -1, so -2 marks an empty slot without relying on inf
+        top_sims = np.full((n, k), -2.0, dtype=np.float32)
+        
+        for i in prange(n):
+            for j in range(n):
+                if j == i:
+                    continue
+                
+                s = np.float32(0.0)
+                for d in range(dim):
+                    s += E[i, d] * E[j, d]
+                
+                if s <= top_sims[i, k - 1]:
+                    continue
+                
+                # Insert into the row's descending top-k list
+                pos = k - 1
+                while pos > 0 and top_sims[i, pos - 1] < s:
+                    top_sims[i, pos] = top_sims[i, pos - 1]
+                    top_idx[i, pos] = top_idx[i, pos - 1]
+                    pos -= 1
+                top_sims[i, pos] = s
+                top_idx[i, pos] = j
+        
+        return top_idx, top_sims
+    
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _pairwise_cosine_topk_int8_jit(Q, scales, k):
+        n, dim = Q.shape
+        top_idx = np.full((n, k), -1, dtype=np.int64)
+        top_sims = np.full((n, k), -2.0, dtype=np.float32)
+        
+        for i in prange(n):
+            for j in range(n):
+                if j == i:
+                    continue
+                
+                # Exact integer accumulation; dim * 127^2 stays well inside int32
+                acc = np.int32(0)
+                for d in range(dim):
+                    acc += np.int32(Q[i, d]) * np.int32(Q[j, d])
+                s = np.float32(acc) * scales[i] * scales[j]
+                
+                if s <= top_sims[i, k - 1]:
+                    continue
+                
+                pos = k - 1
+                while pos > 0 and top_sims[i, pos - 1] < s:
+                    top_sims[i, pos] = top_sims[i, pos - 1]
+                    top_idx[i, pos] = top_idx[i, pos - 1]
+                    pos -= 1
+                top_sims[i, pos] = s
+                top_idx[i, pos] = j
+        
+        return top_idx, top_sims
+    
+    # Compile at import so the first real batch doesn't pay for it
+    _pairwise_cosine_topk_jit(np.eye(2, dtype=np.float32), 1)
+    _pairwise_cosine_topk_int8_jit(np.eye(2, dtype=np.int8), np.ones(2, dtype=np.float32), 1)
+
+
+def pairwise_cosine_topk(E: np.ndarray, k: int, scales: np.ndarray = None):
+    """
+    Find each row's k most similar other rows.
+    
+    Args:
+        E: (N, D) contiguous float32 matrix with L2-normalized rows, or the
+            int8 matrix from quantize_rows
+        k: Number of neighbours per row (1 <= k < N)
+        scales: Per-row scales from quantize_rows; required when E is int8
+    
+    Returns:
+        Tuple of (indices, similarities), each (N, k), sorted by similarity
+        descending within each row
+    """
+    if E.dtype == np.int8:
+        if njit is not None:
+            return _pairwise_cosine_topk_int8_jit(E, scales, k)
+        return _pairwise_cosine_topk_numpy(E * scales[:, None], k)
+    
+    if njit is not None:
+        return _pairwise_cosine_topk_jit(E, k)
+    return _pairwise_cosine_topk_numpy(E, k)
@@ -0,0 +1,159 @@
+"""Inverted token index for case-insensitive substring search over articles."""
+import re
+from bisect import bisect_right
+from typing import List, Dict, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r'\w+')
+INDEX_MAX_ARTICLES = 100000  # Beyond this the index is rebuilt from the current batch
+VOCABULARY_SEPARATOR = '\x1f'  # Never part of a token
+
+
+class ArticleIndex:
+    """
+    Inverted index from lowercased word tokens to article IDs.
+    
+    find() answers the same question as `term.lower() in text.lower()` without
+    scanning every article. Wherever the term occurs, its inner tokens are
+    whole tokens of the text, its first token ends a text token and its last
+    token starts one; candidates are drawn from those postings and then
+    verified against the stored text, so results are exact.
+    """
+    
+    def __init__(self, max_articles: int = INDEX_MAX_ARTICLES):
+        self.max_articles = max_articles
+        # article ID -> (title, content, lowercased "title content")
+        self._texts: Dict[str, Tuple[str, str, str]] = {}
+        # token -> IDs of articles containing it
+        self._postings: Dict[str, Set[str]] = {}
+        # (token, match mode) -> vocabulary tokens it matches
+        self._vocabulary_matches: Dict[Tuple[str, str], List[str]] = {}
+        # Vocabulary joined into one separator-delimited string, with the
+        # offset each token starts at; rebuilt after the vocabulary changes
+        self._vocabulary_scan: Optional[Tuple[str, List[str], List[int]]] = None
+    
+    def __len__(self) -> int:
+        return len(self._texts)
+    
+    def sync(self, articles: List[Dict]):
+        """Index new or changed articles; unchanged ones are skipped."""
+        if len(self._texts) > self.max_articles:
+            self.clear()
+        
+        for article in articles:
+            title = article.get('title', '')
+            content = article.get('content', '')
+            indexed = self._texts.get(article['id'])
+            if indexed is not None and indexed[0] == title and indexed[1] == content:
+                continue
+            
+            if indexed is not None:
+                self._remove(article['id'], indexed[2])
+            self._add(article['id'], title, content)
+    
+    def clear(self):
+        """Drop every indexed article."""
+        self._texts.clear()
+        self._postings.clear()
+        self._vocabulary_matches.clear()
+        self._vocabulary_scan = None
+    
+    def find(self, term: str) -> Set[str]:
+        """IDs of indexed articles whose "title content" contains term, ignoring case."""
+        term_lower = term.lower()
+        spans = [(m.group(), m.start(), m.end()) for m in TOKEN_PATTERN.finditer(term_lower)]
+        
+        if not spans:
+            # Nothing to look up; check every article
+            return {aid for aid, (_, _, text) in self._texts.items() if term_lower in text}
+        
+        candidates = None
+        # Exact tokens are the most selective, so narrow with them first
+        for token, start, end in sorted(spans, key=lambda span: (span[1] == 0) + (span[2] == len(term_lower))):
+            mode = ('contains', 'suffix', 'prefix', 'exact')[(start > 0) * 2 + (end < len(term_lower))]
+            ids = set()
+            for vocabulary_token in self._match_vocabulary(token, mode):
+                ids.update(self._postings[vocabulary_token])
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        
+        return {aid for aid in candidates if term_lower in self._texts[aid][2]}
+    
+    def _match_vocabulary(self, token: str, mode: str) -> List[str]:
+        """Vocabulary tokens a term token can fall on, given where it sits in the term."""
+        if mode == 'exact':
+            return [token] if token in self._postings else []
+        
+        key = (token, mode)
+        matches = self._vocabulary_matches.get(key)
+        if matches is None:
+            matches = self._scan_vocabulary(token, mode)
+            self._vocabulary_matches[key] = matches
+        return matches
+    
+    def _scan_vocabulary(self, token: str, mode: str) -> List[str]:
+        """
+        Vocabulary tokens that end with, start with or contain token.
+        
+        Instead of testing every vocabulary token in Python, the whole
+        vocabulary is searched as one separator-delimited string and each
+        hit is mapped back to its token by binary search over the offsets.
+        """
+        if self._vocabulary_scan is None:
+            tokens = list(self._postings)
+            starts = []
+            offset = 1
+            for vocabulary_token in tokens:
+                starts.append(offset)
+                offset += len(vocabulary_token) + 1
+            text = VOCABULARY_SEPARATOR + VOCABULARY_SEPARATOR.join(tokens) + VOCABULARY_SEPARATOR
+            self._vocabulary_scan = (text, tokens, starts)
+        text, tokens, starts = self._vocabulary_scan
+        
+        # Anchor suffix and prefix lookups on the separators around each token
+        if mode == 'suffix':
+            needle = token + VOCABULARY_SEPARATOR
+        elif mode == 'prefix':
+            needle = VOCABULARY_SEPARATOR + token
+        else:
+            needle = token
+        
+        matches = []
+        position = text.find(needle)
+        while position != -1:
+            # A prefix hit starts on the separator before its token
+            i = bisect_right(starts, position + (mode == 'prefix')) - 1
+            matches.append(tokens[i])
+            if i + 1 == len(starts):
+                break
+            # Skip the rest of this token so each one is reported once
+            position = text.find(needle, starts[i + 1] - (mode == 'prefix'))
+        return matches
+    
+    def _add(self, article_id: str, title: str, content: str):
+        """Index one article."""
+        text = f"{title} {content}".lower()
+        self._texts[article_id] = (title, content, text)
+        for token in set(TOKEN_PATTERN.findall(text)):
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                # A new token can match cached partial lookups
+                self._vocabulary_matches.clear()
+                self._vocabulary_scan = None
+            postings.add(article_id)
+    
+    def _remove(self, article_id: str, text: str):
+        """Drop one article's postings."""
+        del self._texts[article_id]
+        for token in set(TOKEN_PATTERN.findall(text)):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.discard(article_id)
+                if not postings:
+                    del self._postings[token]
+                    self._vocabulary_matches.clear()
+                    self._vocabulary_scan = None
@@ -1,57 +1,236 @@
 """Deduplication service for identifying duplicate news articles."""
-from typing import List, Dict, Tuple
-from src.utils.embeddings import compute_similarity
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Optional, Set
+import numpy as np
+from src.utils.embeddings import get_embeddings
+from src.services._simlib import quantize_rows, pairwise_cosine_topk
 import logging
 
 logger = logging.getLogger(__name__)
 
+try:
+    from datasketch import MinHash, MinHashLSH
+except ImportError:
+    MinHash = MinHashLSH = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 SIMILARITY_THRESHOLD = 0.85  # 85% similarity threshold for duplicates
+DEDUP_TOP_K = 64  # Nearest neighbours considered per article before a full row scan
+QUANTIZE_EMBEDDINGS = True  # Score neighbours on int8 embeddings (~0.003 cosine error)
+QUANTIZE_RESCORE_MARGIN = 0.01  # int8 similarities this close to the threshold are re-scored in FP32
+
+# MinHash/LSH candidate generation settings
+LSH_NUM_PERM = 128
+LSH_THRESHOLD = 0.7
+LSH_MIN_ARTICLES = 200  # Below this, no LSH candidates are added
+SHINGLE_SIZE = 3
+LEDE_TOKENS = 60  # Tokens of content used alongside the title for shingling
+
+STORY_CACHE_MAX_ENTRIES = 2048  # Consolidated stories kept across batches
+STREAM_MAX_ARTICLES = 100000  # Beyond this add_article starts over with an empty state
 
 
 class DeduplicationService:
     """Service for identifying and consolidating duplicate news articles."""
     
-    def __init__(self, similarity_threshold: float = SIMILARITY_THRESHOLD):
+    def __init__(
+        self,
+        similarity_threshold: float = SIMILARITY_THRESHOLD,
+        num_perm: int = LSH_NUM_PERM,
+        lsh_threshold: float = LSH_THRESHOLD,
+        lsh_min_articles: int = LSH_MIN_ARTICLES,
+        quantize: bool = QUANTIZE_EMBEDDINGS
+    ):
         self.similarity_threshold = similarity_threshold
+        self.num_perm = num_perm
+        self.lsh_threshold = lsh_threshold
+        self.lsh_min_articles = lsh_min_articles
+        self.quantize = quantize
+        self._story_cache: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._stream_lock = threading.Lock()
+        self.reset_stream()
+    
+    def _shingles(self, article: Dict) -> Set[str]:
+        """Word 3-gram shingles of the normalized title and lede."""
+        title_tokens = re.findall(r'\w+', article.get('title', '').lower())
+        lede_tokens = re.findall(r'\w+', article.get('content', '').lower())[:LEDE_TOKENS]
+        tokens = title_tokens + lede_tokens
+        
+        if len(tokens) < SHINGLE_SIZE:
+            return {' '.join(tokens)}
+        return {
+            ' '.join(tokens[i:i + SHINGLE_SIZE])
+            for i in range(len(tokens) - SHINGLE_SIZE + 1)
+        }
+    
+    def _lsh_candidates(self, articles: List[Dict]) -> Optional[Dict[str, Set[str]]]:
+        """
+        Find candidate duplicate pairs with MinHash LSH.
+        
+        Returns:
+            Dict mapping each article ID to its candidate IDs, or None for
+            small batches or when datasketch is missing
+        """
+        if MinHashLSH is None or len(articles) < self.lsh_min_articles:
+            return None
+        
+        lsh = MinHashLSH(threshold=self.lsh_threshold, num_perm=self.num_perm)
+        signatures = {}
+        template = self._minhash_template()
+        
+        for article in articles:
+            signature = self._signature(article, template)
+            signatures[article['id']] = signature
+            lsh.insert(article['id'], signature)
+        
+        return {
+            article_id: set(lsh.query(signature))
+            for article_id, signature in signatures.items()
+        }
+    
+    def _minhash_template(self):
+        """
+        Empty MinHash to copy for each article.
+        
+        Copying shares the permutations instead of drawing them per article;
+        shingles are hashed with xxh32 when available instead of SHA-1.
+        """
+        if xxhash is not None:
+            return MinHash(num_perm=self.num_perm, hashfunc=xxhash.xxh32_intdigest)
+        return MinHash(num_perm=self.num_perm)
+    
+    def _signature(self, article: Dict, template):
+        """MinHash signature of an article's shingles."""
+        signature = template.copy()
+        # Apply all shingles in one vectorized update
+        signature.update_batch([shingle.encode('utf-8') for shingle in self._shingles(article)])
+        return signature
+    
+    def add_article(self, article: Dict) -> str:
+        """
+        Add one article to the running deduplication state.
+        
+        For feeds that deliver articles one at a time: each call compares only
+        the new article with those already added, instead of re-running
+        identify_duplicates over everything. Groups follow the same rule as
+        identify_duplicates: a byte-identical article joins its twin's group,
+        otherwise the article joins the earliest group whose first article it
+        matches, or starts a new group. Only the first article of each group
+        is stored and scored against, in one matrix-vector product.
+        
+        Returns:
+            ID of the first article of the article's group
+        """
+        article_id = article['id']
+        with self._stream_lock:
+            if article_id in self._stream_groups:
+                return self._stream_groups[article_id]
+            
+            if len(self._stream_groups) >= STREAM_MAX_ARTICLES:
+                self.reset_stream()
+            
+            content_hash = self._content_hash(article)
+            root_id = self._stream_hashes.get(content_hash)
+            if root_id is None:
+                root_id = self._stream_match(article)
+                self._stream_hashes[content_hash] = root_id
+            
+            self._stream_groups[article_id] = root_id
+            return root_id
+    
+    def _stream_match(self, article: Dict) -> str:
+        """Earliest stored group the article matches, storing it as a new group if none."""
+        text = f"{article.get('title', '')} {article.get('content', '')}"
+        vector = np.asarray(get_embeddings([text])[0], dtype=np.float32)
+        
+        stored = len(self._stream_root_ids)
+        if stored:
+            similarities = self._stream_vectors[:stored] @ vector
+            hits = np.flatnonzero(similarities >= self.similarity_threshold)
+            if len(hits):
+                return self._stream_root_ids[hits[0]]
+        
+        # Store the vector, doubling the buffer when it is full
+        if self._stream_vectors is None or stored == len(self._stream_vectors):
+            grown = np.empty((max(2 * stored, 64), len(vector)), dtype=np.float32)
+            if stored:
+                grown[:stored] = self._stream_vectors
+            self._stream_vectors = grown
+        self._stream_vectors[stored] = vector
+        self._stream_root_ids.append(article['id'])
+        return article['id']
+    
+    def reset_stream(self):
+        """Forget every article added with add_article."""
+        # Article ID -> first article of its group, and the same per content hash
+        self._stream_groups: Dict[str, str] = {}
+        self._stream_hashes: Dict[bytes, str] = {}
+        # Row i of _stream_vectors is the embedding of group _stream_root_ids[i]
+        self._stream_root_ids: List[str] = []
+        self._stream_vectors: Optional[np.ndarray] = None
     
     def identify_duplicates(
         self,
-        articles: List[Dict]
+        articles: List[Dict],
+        vectors: Optional[Dict[str, np.ndarray]] = None
     ) -> Dict[str, List[str]]:
         """
         Identify duplicate articles based on semantic similarity.
         
+        Byte-identical articles are grouped by content hash first, so only one
+        representative per hash reaches the embedding model. For large
+        batches, MinHash LSH adds lexically close candidate pairs to the
+        nearest neighbours checked for semantic similarity.
+        
+        Args:
+            articles: Articles to deduplicate
+            vectors: Optional dict filled with the embedding of each article
+                that was embedded along the way, keyed by article ID
+        
         Returns:
             Dict mapping unique article IDs to lists of duplicate article IDs
         """
+        exact_groups = self._group_exact(articles)
+        representatives = [group[0] for group in exact_groups]
+        
         unique_stories = {}
         processed = set()
+        candidates = self._lsh_candidates(representatives)
         
-        for i, article1 in enumerate(articles):
+        matches = self._find_matches(representatives, candidates, vectors)
+        if vectors:
+            # Byte-identical articles share their representative's embedding
+            for group in exact_groups:
+                if group[0]['id'] in vectors:
+                    for article in group[1:]:
+                        vectors[article['id']] = vectors[group[0]['id']]
+        
+        for i, article1 in enumerate(representatives):
             if article1['id'] in processed:
                 continue
             
-            # Create a combined text for comparison
-            text1 = f"{article1.get('title', '')} {article1.get('content', '')}"
-            
-            duplicates = [article1['id']]
+            duplicates = [a['id'] for a in exact_groups[i]]
+            for article_id in duplicates[1:]:
+                logger.info(f"Found duplicate: {article1['id']} <-> {article_id} (exact match)")
             
-            for j, article2 in enumerate(articles[i+1:], start=i+1):
+            for j, similarity in matches.get(i, []):
+                article2 = representatives[j]
                 if article2['id'] in processed:
                     continue
                 
-                text2 = f"{article2.get('title', '')} {article2.get('content', '')}"
-                
-                # Compute similarity
-                similarity = compute_similarity(text1, text2)
-                
-                if similarity >= self.similarity_threshold:
-                    duplicates.append(article2['id'])
-                    processed.add(article2['id'])
-                    logger.info(
-                        f"Found duplicate: {article1['id']} <-> {article2['id']} "
-                        f"(similarity: {similarity:.3f})"
-                    )
+                duplicates.extend(a['id'] for a in exact_groups[j])
+                processed.add(article2['id'])
+                logger.info(
+                    f"Found duplicate: {article1['id']} <-> {article2['id']} "
+                    f"(similarity: {similarity:.3f})"
+                )
             
             if len(duplicates) > 0:
                 unique_stories[article1['id']] = duplicates
@@ -59,52 +238,172 @@ class DeduplicationService:
         
         return unique_stories
     
+    @staticmethod
+    def _content_hash(article: Dict) -> bytes:
+        """128-bit BLAKE2b digest of an article's title and content."""
+        text = f"{article.get('title', '')}\x00{article.get('content', '')}"
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+    
+    def _group_exact(self, articles: List[Dict]) -> List[List[Dict]]:
+        """Group byte-identical articles by content hash, in first-seen order."""
+        groups = {}
+        for article in articles:
+            groups.setdefault(self._content_hash(article), []).append(article)
+        return list(groups.values())
+    
+    def _find_matches(
+        self,
+        articles: List[Dict],
+        candidates: Optional[Dict[str, Set[str]]] = None,
+        vectors: Optional[Dict[str, np.ndarray]] = None
+    ) -> Dict[int, List[Tuple[int, float]]]:
+        """
+        Find later articles whose similarity clears the threshold.
+        
+        All articles are embedded in one batch and their nearest neighbours
+        come from the similarity kernel, widened to a full row scan wherever
+        all k neighbours are duplicates. LSH candidates are an extra source:
+        pairs the kernel did not return are scored in a single vectorized
+        pass, so paraphrases with little word overlap are still found.
+        
+        Returns:
+            Dict mapping article index i to [(j, similarity)] with j > i, in index order
+        """
+        if len(articles) < 2:
+            return {}
+        
+        texts = [f"{a.get('title', '')} {a.get('content', '')}" for a in articles]
+        # Embeddings are stored unit length, so cosine is a plain dot product
+        E = np.ascontiguousarray(get_embeddings(texts), dtype=np.float32)
+        if vectors is not None:
+            vectors.update(zip((a['id'] for a in articles), E))
+        
+        k = min(len(articles) - 1, DEDUP_TOP_K)
+        if self.quantize:
+            Q, scales = quantize_rows(E)
+            neighbor_idx, neighbor_sims = pairwise_cosine_topk(Q, k, scales)
+            # Re-score pairs near the threshold in FP32 so the int8 error
+            # can't flip a duplicate decision
+            rows, cols = np.nonzero(
+                np.abs(neighbor_sims - self.similarity_threshold) < QUANTIZE_RESCORE_MARGIN
+            )
+            neighbor_sims[rows, cols] = np.einsum('ij,ij->i', E[rows], E[neighbor_idx[rows, cols]])
+        else:
+            neighbor_idx, neighbor_sims = pairwise_cosine_topk(E, k)
+        
+        # A row whose k neighbours all clear the threshold may have more
+        # duplicates than k, so it is rescanned against every later article
+        saturated = neighbor_sims.min(axis=1) >= self.similarity_threshold if k < len(articles) - 1 else None
+        
+        found = {}
+        for i in range(len(articles)):
+            if saturated is not None and saturated[i]:
+                similarities = E[i + 1:] @ E[i]
+                hits = np.flatnonzero(similarities >= self.similarity_threshold)
+                row = zip((hits + i + 1).tolist(), similarities[hits].tolist())
+            else:
+                row = zip(neighbor_idx[i].tolist(), neighbor_sims[i].tolist())
+            for j, similarity in row:
+                if j > i and similarity >= self.similarity_threshold:
+                    found.setdefault(i, {})[j] = similarity
+        
+        if candidates is not None:
+            index_of = {a['id']: i for i, a in enumerate(articles)}
+            pairs = np.array(
+                [
+                    (i, index_of[candidate_id])
+                    for i, article in enumerate(articles)
+                    for candidate_id in candidates[article['id']]
+                    if index_of[candidate_id] > i and index_of[candidate_id] not in found.get(i, ())
+                ],
+                dtype=np.int64
+            ).reshape(-1, 2)
+            
+            # Score every remaining candidate pair in one vectorized row-wise dot product
+            similarities = np.einsum('ij,ij->i', E[pairs[:, 0]], E[pairs[:, 1]])
+            keep = similarities >= self.similarity_threshold
+            for (i, j), similarity in zip(pairs[keep].tolist(), similarities[keep].tolist()):
+                found.setdefault(i, {})[j] = similarity
+        
+        return {i: sorted(row.items()) for i, row in found.items()}
+    
     def consolidate_story(
         self,
         article_ids: List[str],
-        articles: List[Dict]
+        articles: List[Dict],
+        article_dict: Optional[Dict[str, Dict]] = None
     ) -> Dict:
         """
         Consolidate multiple duplicate articles into a single story.
         
+        Results are cached on the group's article IDs and fields, so a group
+        seen unchanged in an earlier batch is not consolidated again.
+        
         Args:
             article_ids: List of article IDs to consolidate
             articles: List of all articles
-            
+            article_dict: Optional prebuilt mapping of article ID to article,
+                to avoid rebuilding it for every group
+        
         Returns:
             Consolidated story dictionary
         """
-        article_dict = {a['id']: a for a in articles}
+        if article_dict is None:
+            article_dict = {a['id']: a for a in articles}
         story_articles = [article_dict[aid] for aid in article_ids if aid in article_dict]
         
         if not story_articles:
             return None
         
+        key = (tuple(article_ids), tuple(
+            (a['id'], a.get('title', ''), a.get('content', ''), a.get('source'),
+             a.get('published_at'), a.get('url'))
+            for a in story_articles
+        ))
+        story = self._story_cache.get(key)
+        if story is None:
+            story = self._consolidate(article_ids, story_articles)
+            self._story_cache[key] = story
+            while len(self._story_cache) > STORY_CACHE_MAX_ENTRIES:
+                self._story_cache.popitem(last=False)
+        self._story_cache.move_to_end(key)
+        
+        # Hand out copies so callers can't alter the cached lists
+        return {**story, 'article_ids': list(story['article_ids']), 'sources': list(story['sources'])}
+    
+    def _consolidate(self, article_ids: List[str], story_articles: List[Dict]) -> Dict:
+        """Build the consolidated story for a group of articles."""
         # Use the first article as base, but combine information
         base_article = story_articles[0]
         
-        # Combine titles (use the most detailed one)
-        titles = [a.get('title', '') for a in story_articles]
-        consolidated_title = max(titles, key=len)
-        
-        # Combine content (use the longest one)
-        contents = [a.get('content', '') for a in story_articles]
-        consolidated_content = max(contents, key=len)
-        
-        # Combine sources
-        sources = list(set([a.get('source', '') for a in story_articles if a.get('source')]))
-        
-        # Use earliest publication date
-        published_dates = [a.get('published_at') for a in story_articles if a.get('published_at')]
-        earliest_date = min(published_dates) if published_dates else None
+        # One pass: longest title and content, distinct sources, earliest date
+        consolidated_title = ''
+        consolidated_content = ''
+        sources = set()
+        earliest_date = None
+        for article in story_articles:
+            title = article.get('title', '')
+            if len(title) > len(consolidated_title):
+                consolidated_title = title
+            
+            content = article.get('content', '')
+            if len(content) > len(consolidated_content):
+                consolidated_content = content
+            
+            source = article.get('source')
+            if source:
+                sources.add(source)
+            
+            published_at = article.get('published_at')
+            if published_at and (earliest_date is None or published_at < earliest_date):
+                earliest_date = published_at
         
         return {
             'story_id': f"STORY_{base_article['id']}",
             'consolidated_title': consolidated_title,
             'consolidated_content': consolidated_content,
-            'article_ids': article_ids,
-            'sources': sources,
+            'article_ids': list(article_ids),
+            'sources': list(sources),
             'published_at': earliest_date,
             'url': base_article.get('url')
         }
-
@@ -1,17 +1,82 @@
 """Entity extraction service using NER."""
+import functools
+import threading
+from bisect import bisect_right
 import spacy
-from typing import List, Dict, Tuple
+from typing import Iterator, List, Dict, Tuple, Optional, Set
 import logging
 import re
 
 logger = logging.getLogger(__name__)
 
-# Load spaCy model
 try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    logger.warning("spaCy model not found. Please run: python -m spacy download en_core_web_sm")
-    nlp = None
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+# Number of documents spaCy processes per batch in nlp.pipe
+NER_BATCH_SIZE = 64
+
+# Only doc.ents is read, so these components are never loaded; tok2vec
+# stays in case the pipeline's NER listens to it
+NER_EXCLUDED_PIPES = ["tagger", "parser", "attribute_ruler", "lemmatizer"]
+NER_MAX_CHARS = 100000  # Longer texts are truncated before NER
+
+# Joins a batch's texts for one pattern scan; no pattern or keyword can match across it
+SCAN_SEPARATOR = '\x1e'
+
+
+def _compile_pattern_db(patterns: List[str]):
+    """Compile regexes into one case-insensitive Hyperscan block-mode database (None without hyperscan)."""
+    if hyperscan is None:
+        return None
+    
+    db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    db.compile(
+        expressions=[p.encode('ascii') for p in patterns],
+        ids=list(range(len(patterns))),
+        elements=len(patterns),
+        flags=hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST
+    )
+    return db
+
+
+def _build_keyword_automaton(keywords_by_label: Dict[str, List[str]]):
+    """Build an Aho-Corasick automaton mapping each keyword to its labels (None without pyahocorasick)."""
+    if ahocorasick is None:
+        return None
+    
+    labels_by_keyword = {}
+    for label, keywords in keywords_by_label.items():
+        for keyword in keywords:
+            labels_by_keyword.setdefault(keyword, []).append(label)
+    
+    automaton = ahocorasick.Automaton()
+    for keyword, labels in labels_by_keyword.items():
+        automaton.add_word(keyword, labels)
+    automaton.make_automaton()
+    return automaton
+
+
+@functools.cache
+def get_nlp():
+    """Load the shared spaCy pipeline once per process (None if not installed)."""
+    try:
+        nlp = spacy.load("en_core_web_sm", exclude=NER_EXCLUDED_PIPES)
+    except OSError:
+        logger.warning("spaCy model not found. Please run: python -m spacy download en_core_web_sm")
+        return None
+    
+    if "ner" not in nlp.pipe_names:
+        logger.warning(f"spaCy pipeline has no NER component: {nlp.pipe_names}")
+    nlp.max_length = NER_MAX_CHARS
+    return nlp
 
 
 class EntityExtractionService:
@@ -28,6 +93,34 @@ class EntityExtractionService:
         r'\bSEBI\b', r'\bNSE\b', r'\bBSE\b'
     ]
     
+    # Common company names
+    COMPANY_PATTERNS = [
+        r'\bTCS\b', r'\bTata\s+Consultancy\b', r'\bInfosys\b', r'\bWipro\b',
+        r'\bReliance\s+Industries\b', r'\bRIL\b', r'\bBharti\s+Airtel\b',
+        r'\bMaruti\s+Suzuki\b', r'\bTata\s+Motors\b', r'\bL&T\b',
+        r'\bLarsen\s+&\s+Toubro\b', r'\bSun\s+Pharma\b'
+    ]
+    
+    # Specific sector mentions
+    SECTOR_PATTERNS = [
+        (r'\bbanking\s+sector\b', 'Banking'),
+        (r'\bIT\s+sector\b', 'IT'),
+        (r'\btelecom\s+sector\b', 'Telecom'),
+        (r'\bautomobile\s+sector\b', 'Automobile'),
+        (r'\bpharma\s+sector\b', 'Pharmaceutical'),
+    ]
+    
+    # Patterns compiled once at class load
+    _BANK_RX = [re.compile(p, re.IGNORECASE) for p in BANK_PATTERNS]
+    _REGULATOR_RX = [re.compile(p, re.IGNORECASE) for p in REGULATOR_PATTERNS]
+    _COMPANY_RX = [re.compile(p, re.IGNORECASE) for p in COMPANY_PATTERNS]
+    _SECTOR_RX = [(re.compile(p, re.IGNORECASE), sector) for p, sector in SECTOR_PATTERNS]
+    
+    # All patterns in one Hyperscan database, scanned once per text
+    _SCAN_PATTERNS = BANK_PATTERNS + REGULATOR_PATTERNS + COMPANY_PATTERNS + [p for p, _ in SECTOR_PATTERNS]
+    _PATTERN_DB = _compile_pattern_db(_SCAN_PATTERNS)
+    _scratch = threading.local()  # Hyperscan scratch space is per thread
+    
     SECTOR_KEYWORDS = {
         'Banking': ['bank', 'banking', 'lender', 'loan', 'deposit', 'credit'],
         'Financial Services': ['financial', 'finance', 'banking', 'investment'],
@@ -38,8 +131,11 @@ class EntityExtractionService:
         'Infrastructure': ['infrastructure', 'construction', 'project', 'metro']
     }
     
+    # Keywords are matched as written against lowercased text, as with `in`
+    _SECTOR_AUTOMATON = _build_keyword_automaton(SECTOR_KEYWORDS)
+    
     def __init__(self):
-        if nlp is None:
+        if get_nlp() is None:
             logger.warning("spaCy model not loaded. Entity extraction may be limited.")
     
     def extract_entities(self, text: str, title: str = "") -> Dict[str, List[Dict]]:
@@ -50,6 +146,61 @@ class EntityExtractionService:
             Dict with entity types as keys and lists of entities as values
         """
         full_text = f"{title} {text}"
+        nlp = get_nlp()
+        doc = nlp(full_text[:NER_MAX_CHARS]) if nlp else None
+        return self._build_entities(
+            full_text, doc, self._scan_patterns(full_text), self._match_sector_keywords([full_text])[0]
+        )
+    
+    def extract_entities_batch(
+        self,
+        texts: List[str],
+        titles: Optional[List[str]] = None
+    ) -> List[Dict[str, List[Dict]]]:
+        """
+        Extract entities from many texts with a single batched NER pass.
+        
+        The pattern and sector keyword scans also run once over the whole
+        batch joined into one string, rather than once per text.
+        
+        Args:
+            texts: Article contents
+            titles: Optional article titles, aligned with texts
+        
+        Returns:
+            List of entity dicts in the same order as texts
+        """
+        if titles is None:
+            titles = [""] * len(texts)
+        
+        full_texts = [f"{title} {text}" for text, title in zip(texts, titles)]
+        
+        nlp = get_nlp()
+        if nlp:
+            docs = nlp.pipe(
+                [full_text[:NER_MAX_CHARS] for full_text in full_texts],
+                batch_size=NER_BATCH_SIZE
+            )
+        else:
+            docs = [None] * len(full_texts)
+        
+        return [
+            self._build_entities(full_text, doc, pattern_matches, keyword_sectors)
+            for full_text, doc, pattern_matches, keyword_sectors in zip(
+                full_texts, docs,
+                self._scan_patterns_batch(full_texts),
+                self._match_sector_keywords(full_texts)
+            )
+        ]
+    
+    def _build_entities(
+        self,
+        full_text: str,
+        doc,
+        pattern_matches: Optional[List[List[str]]],
+        keyword_sectors: Set[str]
+    ) -> Dict[str, List[Dict]]:
+        """Build the entity dict for a text from its (optional) spaCy doc and pattern scans."""
         entities = {
             'companies': [],
             'sectors': [],
@@ -59,9 +210,7 @@ class EntityExtractionService:
         }
         
         # Use spaCy for NER if available
-        if nlp:
-            doc = nlp(full_text)
-            
+        if doc is not None:
             for ent in doc.ents:
                 if ent.label_ == "ORG":
                     # Check if it's a company
@@ -71,7 +220,7 @@ class EntityExtractionService:
                             'confidence': 0.9
                         })
                     # Check if it's a regulator
-                    elif any(re.search(pattern, ent.text, re.IGNORECASE) for pattern in self.REGULATOR_PATTERNS):
+                    elif any(rx.search(ent.text) for rx in self._REGULATOR_RX):
                         entities['regulators'].append({
                             'name': ent.text,
                             'confidence': 0.95
@@ -84,10 +233,10 @@ class EntityExtractionService:
                     })
         
         # Pattern-based extraction for financial entities
-        self._extract_financial_entities(full_text, entities)
+        self._extract_financial_entities(full_text, entities, pattern_matches)
         
         # Extract sectors
-        self._extract_sectors(full_text, entities)
+        self._extract_sectors(full_text, entities, keyword_sectors, pattern_matches)
         
         # Remove duplicates
         for key in entities:
@@ -101,66 +250,165 @@ class EntityExtractionService:
         
         return entities
     
-    def _extract_financial_entities(self, text: str, entities: Dict):
+    def _scan_patterns(self, text: str) -> Optional[List[List[str]]]:
+        """
+        Match every pattern against the text in a single Hyperscan scan.
+        
+        Hyperscan's word boundaries, whitespace and caseless matching are
+        ASCII-only, so non-ASCII text goes through the Python regexes instead
+        to keep their results.
+        
+        Returns:
+            For each pattern in _SCAN_PATTERNS, its non-overlapping matches in
+            text order (as re.finditer would give), or None when not scanned
+        """
+        return next(self._scan_patterns_batch([text]))
+    
+    def _scan_patterns_batch(self, texts: List[str]) -> Iterator[Optional[List[List[str]]]]:
+        """
+        _scan_patterns for many texts with one Hyperscan scan.
+        
+        The ASCII texts are joined with SCAN_SEPARATOR, which acts as a word
+        boundary and is not whitespace to Hyperscan, so every match lies
+        within one text; matches are mapped back by their start offset.
+        Results are yielded lazily, in the order of texts.
+        """
+        scanned = [i for i, text in enumerate(texts) if text.isascii()]
+        if self._PATTERN_DB is None or not scanned:
+            yield from [None] * len(texts)
+            return
+        
+        scratch = getattr(self._scratch, 'scratch', None)
+        if scratch is None:
+            scratch = self._scratch.scratch = hyperscan.Scratch(self._PATTERN_DB)
+        
+        starts = []
+        offset = 0
+        for i in scanned:
+            starts.append(offset)
+            offset += len(texts[i]) + 1
+        data = SCAN_SEPARATOR.join(texts[i] for i in scanned).encode('ascii')
+        
+        # text index -> [(pattern_id, start, end)], relative to that text
+        spans = {}
+        
+        def on_match(pattern_id, start, end, flags, context):
+            k = bisect_right(starts, start) - 1
+            spans.setdefault(scanned[k], []).append((pattern_id, start - starts[k], end - starts[k]))
+        
+        self._PATTERN_DB.scan(data, match_event_handler=on_match, scratch=scratch)
+        
+        for i, text in enumerate(texts):
+            yield self._select_matches(text, spans.get(i, ())) if text.isascii() else None
+    
+    def _select_matches(self, text: str, spans: List[Tuple[int, int, int]]) -> List[List[str]]:
+        """Turn raw Hyperscan (pattern_id, start, end) spans in text into re.finditer-style matches per pattern."""
+        matches = [[] for _ in self._SCAN_PATTERNS]
+        last_end = [-1] * len(self._SCAN_PATTERNS)
+        # Leftmost-longest, skipping overlaps, like re.finditer
+        for pattern_id, start, end in sorted(spans, key=lambda span: (span[1], -span[2])):
+            if start >= last_end[pattern_id]:
+                matches[pattern_id].append(text[start:end])
+                last_end[pattern_id] = end
+        return matches
+    
+    def _extract_financial_entities(
+        self,
+        text: str,
+        entities: Dict,
+        pattern_matches: Optional[List[List[str]]] = None
+    ):
         """Extract financial entities using patterns."""
+        if pattern_matches is None:
+            bank_matches = [[m.group() for m in rx.finditer(text)] for rx in self._BANK_RX]
+            regulator_matches = [[m.group() for m in rx.finditer(text)] for rx in self._REGULATOR_RX]
+            company_matches = [[m.group() for m in rx.finditer(text)] for rx in self._COMPANY_RX]
+        else:
+            n_bank = len(self.BANK_PATTERNS)
+            n_regulator = len(self.REGULATOR_PATTERNS)
+            n_company = len(self.COMPANY_PATTERNS)
+            bank_matches = pattern_matches[:n_bank]
+            regulator_matches = pattern_matches[n_bank:n_bank + n_regulator]
+            company_matches = pattern_matches[n_bank + n_regulator:n_bank + n_regulator + n_company]
+        
         # Extract banks
-        for pattern in self.BANK_PATTERNS:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
+        for found in bank_matches:
+            for name in found:
                 entities['companies'].append({
-                    'name': match.group(),
+                    'name': name,
                     'confidence': 0.95
                 })
         
         # Extract regulators
-        for pattern in self.REGULATOR_PATTERNS:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
+        for found in regulator_matches:
+            for name in found:
                 entities['regulators'].append({
-                    'name': match.group(),
+                    'name': name,
                     'confidence': 0.95
                 })
         
         # Common company names
-        company_patterns = [
-            r'\bTCS\b', r'\bTata\s+Consultancy\b', r'\bInfosys\b', r'\bWipro\b',
-            r'\bReliance\s+Industries\b', r'\bRIL\b', r'\bBharti\s+Airtel\b',
-            r'\bMaruti\s+Suzuki\b', r'\bTata\s+Motors\b', r'\bL&T\b',
-            r'\bLarsen\s+&\s+Toubro\b', r'\bSun\s+Pharma\b'
-        ]
-        
-        for pattern in company_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
+        for found in company_matches:
+            for name in found:
                 entities['companies'].append({
-                    'name': match.group(),
+                    'name': name,
                     'confidence': 0.9
                 })
     
-    def _extract_sectors(self, text: str, entities: Dict):
-        """Extract sectors based on keywords."""
-        text_lower = text.lower()
+    def _match_sector_keywords(self, texts: List[str]) -> List[Set[str]]:
+        """
+        Sectors whose keywords occur in each text.
+        
+        The lowercased texts are joined with SCAN_SEPARATOR and walked by the
+        automaton once; hits come back in order, so each is assigned to its
+        text by advancing past the texts that end before it.
+        """
+        lowered = [text.lower() for text in texts]
+        
+        if self._SECTOR_AUTOMATON is None:
+            return [
+                {
+                    sector for sector, keywords in self.SECTOR_KEYWORDS.items()
+                    if any(keyword in text_lower for keyword in keywords)
+                }
+                for text_lower in lowered
+            ]
         
-        for sector, keywords in self.SECTOR_KEYWORDS.items():
-            if any(keyword in text_lower for keyword in keywords):
+        found = [set() for _ in lowered]
+        k = 0
+        end = len(lowered[0]) if lowered else 0
+        # Hits arrive in text order; step to the text each one ends in
+        for end_index, sectors in self._SECTOR_AUTOMATON.iter(SCAN_SEPARATOR.join(lowered)):
+            while end_index >= end:
+                k += 1
+                end += len(lowered[k]) + 1
+            found[k].update(sectors)
+        return found
+    
+    def _extract_sectors(
+        self,
+        text: str,
+        entities: Dict,
+        keyword_sectors: Set[str],
+        pattern_matches: Optional[List[List[str]]] = None
+    ):
+        """Extract sectors based on keywords."""
+        for sector in self.SECTOR_KEYWORDS:
+            if sector in keyword_sectors:
                 entities['sectors'].append({
                     'name': sector,
                     'confidence': 0.7
                 })
         
         # Specific sector mentions
-        sector_patterns = [
-            (r'\bbanking\s+sector\b', 'Banking'),
-            (r'\bIT\s+sector\b', 'IT'),
-            (r'\btelecom\s+sector\b', 'Telecom'),
-            (r'\bautomobile\s+sector\b', 'Automobile'),
-            (r'\bpharma\s+sector\b', 'Pharmaceutical'),
-        ]
+        if pattern_matches is None:
+            mentioned = [rx.search(text) is not None for rx, _ in self._SECTOR_RX]
+        else:
+            mentioned = [bool(found) for found in pattern_matches[-len(self.SECTOR_PATTERNS):]]
         
-        for pattern, sector in sector_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
+        for (_, sector), is_mentioned in zip(self.SECTOR_PATTERNS, mentioned):
+            if is_mentioned:
                 entities['sectors'].append({
                     'name': sector,
                     'confidence': 0.9
                 })
-
@@ -1,5 +1,5 @@
 """Impact mapping service - maps entities to stock impacts."""
-from typing import List, Dict, Tuple
+from typing import List, Dict
 from src.utils.stock_mapper import (
     map_company_to_stock,
     map_sector_to_stocks,
@@ -19,117 +19,106 @@ class ImpactMappingService:
         
         Args:
             entities: Dictionary of extracted entities by type
-            
+        
         Returns:
             List of stock impact dictionaries
         """
+        # symbol -> [confidence, impact_type, reasoning template, template args].
+        # Reasoning is only formatted for the entries that survive.
         stock_impacts = {}
         
         # Map companies to stocks (direct impact)
         for company in entities.get('companies', []):
             company_name = company['name']
-            stock_mappings = map_company_to_stock(company_name)
+            entity_confidence = company.get('confidence', 1.0)
             
-            for symbol, confidence, impact_type in stock_mappings:
+            for symbol, confidence, impact_type in map_company_to_stock(company_name):
                 # Adjust confidence based on entity confidence
-                adjusted_confidence = confidence * company.get('confidence', 1.0)
+                adjusted_confidence = confidence * entity_confidence
+                current = stock_impacts.get(symbol)
                 
-                if symbol not in stock_impacts:
-                    stock_impacts[symbol] = {
-                        'symbol': symbol,
-                        'confidence': adjusted_confidence,
-                        'impact_type': impact_type,
-                        'reasoning': f"Direct mention of {company_name}"
-                    }
-                else:
-                    # Take maximum confidence if already exists
-                    if adjusted_confidence > stock_impacts[symbol]['confidence']:
-                        stock_impacts[symbol]['confidence'] = adjusted_confidence
-                        stock_impacts[symbol]['impact_type'] = impact_type
-                        stock_impacts[symbol]['reasoning'] = f"Direct mention of {company_name}"
+                # Take maximum confidence if already exists
+                if current is None or adjusted_confidence > current[0]:
+                    stock_impacts[symbol] = [adjusted_confidence, impact_type, "Direct mention of {}", (company_name,)]
         
         # Map sectors to stocks (sector-wide impact)
         for sector in entities.get('sectors', []):
             sector_name = sector['name']
-            sector_stocks = map_sector_to_stocks(sector_name)
+            entity_confidence = sector.get('confidence', 1.0)
             
-            for symbol, confidence, impact_type in sector_stocks:
+            for symbol, confidence, impact_type in map_sector_to_stocks(sector_name):
                 # Adjust confidence based on entity confidence
-                adjusted_confidence = confidence * sector.get('confidence', 1.0)
+                adjusted_confidence = confidence * entity_confidence
+                current = stock_impacts.get(symbol)
                 
-                if symbol not in stock_impacts:
-                    stock_impacts[symbol] = {
-                        'symbol': symbol,
-                        'confidence': adjusted_confidence,
-                        'impact_type': impact_type,
-                        'reasoning': f"Sector-wide impact: {sector_name}"
-                    }
-                else:
-                    # For sector impacts, we might want to keep the higher confidence
-                    # but update reasoning if it's more specific
-                    if impact_type == 'sector' and stock_impacts[symbol]['impact_type'] != 'direct':
-                        if adjusted_confidence > stock_impacts[symbol]['confidence']:
-                            stock_impacts[symbol]['confidence'] = adjusted_confidence
-                            stock_impacts[symbol]['reasoning'] = f"Sector-wide impact: {sector_name}"
+                if current is None:
+                    stock_impacts[symbol] = [adjusted_confidence, impact_type, "Sector-wide impact: {}", (sector_name,)]
+                # Sector impacts never displace a direct mention, and keep the existing type
+                elif (impact_type == 'sector' and current[1] != 'direct'
+                      and adjusted_confidence > current[0]):
+                    current[0] = adjusted_confidence
+                    current[2:] = ["Sector-wide impact: {}", (sector_name,)]
         
         # Map regulators to stocks (regulatory impact)
         for regulator in entities.get('regulators', []):
             regulator_name = regulator['name']
+            entity_confidence = regulator.get('confidence', 1.0)
             regulator_impacts = map_regulator_to_impacts(regulator_name)
             
             # Add direct stock impacts
             for symbol, confidence, impact_type in regulator_impacts.get('stocks', []):
-                adjusted_confidence = confidence * regulator.get('confidence', 1.0)
+                adjusted_confidence = confidence * entity_confidence
+                current = stock_impacts.get(symbol)
                 
-                if symbol not in stock_impacts:
-                    stock_impacts[symbol] = {
-                        'symbol': symbol,
-                        'confidence': adjusted_confidence,
-                        'impact_type': impact_type,
-                        'reasoning': f"Regulatory impact from {regulator_name}"
-                    }
-                else:
-                    # Regulatory impacts might override sector impacts
-                    if impact_type == 'regulatory':
-                        if adjusted_confidence > stock_impacts[symbol]['confidence']:
-                            stock_impacts[symbol]['confidence'] = adjusted_confidence
-                            stock_impacts[symbol]['impact_type'] = impact_type
-                            stock_impacts[symbol]['reasoning'] = f"Regulatory impact from {regulator_name}"
+                # Regulatory impacts might override existing ones
+                if current is None or (impact_type == 'regulatory' and adjusted_confidence > current[0]):
+                    stock_impacts[symbol] = [adjusted_confidence, impact_type, "Regulatory impact from {}", (regulator_name,)]
             
             # Add sector impacts from regulators
             for sector_name in regulator_impacts.get('sectors', []):
-                sector_stocks = map_sector_to_stocks(sector_name)
-                for symbol, confidence, impact_type in sector_stocks:
-                    adjusted_confidence = confidence * 0.8 * regulator.get('confidence', 1.0)
+                for symbol, confidence, _ in map_sector_to_stocks(sector_name):
+                    adjusted_confidence = confidence * 0.8 * entity_confidence
+                    current = stock_impacts.get(symbol)
                     
-                    if symbol not in stock_impacts:
-                        stock_impacts[symbol] = {
-                            'symbol': symbol,
-                            'confidence': adjusted_confidence,
-                            'impact_type': 'regulatory',
-                            'reasoning': f"Regulatory impact on {sector_name} sector from {regulator_name}"
-                        }
-                    else:
-                        if adjusted_confidence > stock_impacts[symbol]['confidence']:
-                            stock_impacts[symbol]['confidence'] = adjusted_confidence
-                            stock_impacts[symbol]['impact_type'] = 'regulatory'
-                            stock_impacts[symbol]['reasoning'] = f"Regulatory impact on {sector_name} sector from {regulator_name}"
+                    if current is None or adjusted_confidence > current[0]:
+                        stock_impacts[symbol] = [
+                            adjusted_confidence, 'regulatory',
+                            "Regulatory impact on {} sector from {}", (sector_name, regulator_name)
+                        ]
         
-        return list(stock_impacts.values())
+        return [
+            {
+                'symbol': symbol,
+                'confidence': confidence,
+                'impact_type': impact_type,
+                'reasoning': template.format(*args)
+            }
+            for symbol, (confidence, impact_type, template, args) in stock_impacts.items()
+        ]
     
     def get_impact_summary(self, stock_impacts: List[Dict]) -> Dict:
-        """Get a summary of stock impacts."""
-        direct_impacts = [s for s in stock_impacts if s['impact_type'] == 'direct']
-        sector_impacts = [s for s in stock_impacts if s['impact_type'] == 'sector']
-        regulatory_impacts = [s for s in stock_impacts if s['impact_type'] == 'regulatory']
-        
-        return {
+        """Get a summary of stock impacts in a single pass."""
+        summary = {
             'total_impacts': len(stock_impacts),
-            'direct_impacts': len(direct_impacts),
-            'sector_impacts': len(sector_impacts),
-            'regulatory_impacts': len(regulatory_impacts),
-            'high_confidence': len([s for s in stock_impacts if s['confidence'] >= 0.8]),
-            'medium_confidence': len([s for s in stock_impacts if 0.5 <= s['confidence'] < 0.8]),
-            'low_confidence': len([s for s in stock_impacts if s['confidence'] < 0.5])
+            'direct_impacts': 0,
+            'sector_impacts': 0,
+            'regulatory_impacts': 0,
+            'high_confidence': 0,
+            'medium_confidence': 0,
+            'low_confidence': 0
         }
-
+        
+        for impact in stock_impacts:
+            type_key = f"{impact['impact_type']}_impacts"
+            if type_key in summary and type_key != 'total_impacts':
+                summary[type_key] += 1
+            
+            confidence = impact['confidence']
+            if confidence >= 0.8:
+                summary['high_confidence'] += 1
+            elif confidence >= 0.5:
+                summary['medium_confidence'] += 1
+            elif confidence < 0.5:
+                summary['low_confidence'] += 1
+        
+        return summary
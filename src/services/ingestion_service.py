@@ -1,14 +1,69 @@
 """News ingestion service for periodic polling."""
 import feedparser
+import orjson
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Dict
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import List, Dict, Optional
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
 import logging
+import re
+import sched
+import threading
 import time
 
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
 logger = logging.getLogger(__name__)
 
+RSS_HOST_MIN_INTERVAL = 1.0  # Seconds between requests to the same host
+WHITESPACE_PATTERN = re.compile(r'\s+')
+DATE_CACHE_MAX_ENTRIES = 1024  # Distinct feed date strings remembered
+MOCK_DATA_PATH = "data/mock_news.json"
+
+
+def load_mock_articles(file_path: str = MOCK_DATA_PATH) -> List[Dict]:
+    """Parse a mock news JSON file (FileNotFoundError if it doesn't exist)."""
+    with open(file_path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+def _clean_html(markup: str) -> str:
+    """Plain text of an HTML fragment, with whitespace collapsed."""
+    if '<' not in markup and '&' not in markup:
+        return WHITESPACE_PATTERN.sub(' ', markup).strip()
+    
+    if LexborHTMLParser is not None:
+        body = LexborHTMLParser(markup).body
+        text = body.text(separator=' ') if body is not None else ''
+    else:
+        text = BeautifulSoup(markup, 'html.parser').get_text(' ')
+    return WHITESPACE_PATTERN.sub(' ', text).strip()
+
+
+@lru_cache(maxsize=DATE_CACHE_MAX_ENTRIES)
+def _parse_feed_date(date_str: str) -> Optional[str]:
+    """Naive-UTC ISO timestamp for a feed date string, or None if unparseable."""
+    try:
+        # RFC 822 dates, as used by RSS
+        parsed = parsedate_to_datetime(date_str)
+    except (TypeError, ValueError):
+        try:
+            # ISO 8601 / W3C dates, as used by Atom
+            parsed = datetime.fromisoformat(date_str)
+        except ValueError:
+            return None
+    
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat()
+
 
 class NewsIngestionService:
     """Service for ingesting news from various sources."""
@@ -19,19 +74,23 @@ class NewsIngestionService:
             'bse': 'https://www.bseindia.com/rss',
             'rbi': 'https://www.rbi.org.in/rss'
         }
+        # host -> monotonic time its next request may start
+        self._host_next_request: Dict[str, float] = {}
+        self._host_lock = threading.Lock()
     
     def fetch_from_rss(self, rss_url: str, source_name: str) -> List[Dict]:
         """Fetch news from RSS feed."""
         articles = []
         
         try:
+            self._wait_for_host(rss_url)
             feed = feedparser.parse(rss_url)
             
             for entry in feed.entries[:10]:  # Limit to 10 most recent
                 article = {
                     'id': f"{source_name.upper()}_{entry.get('id', entry.get('link', ''))}",
                     'title': entry.get('title', ''),
-                    'content': entry.get('summary', entry.get('description', '')),
+                    'content': _clean_html(entry.get('summary', entry.get('description', ''))),
                     'source': source_name.upper(),
                     'published_at': self._parse_date(entry.get('published', '')),
                     'url': entry.get('link', '')
@@ -43,14 +102,20 @@ class NewsIngestionService:
         
         return articles
     
+    def _wait_for_host(self, url: str):
+        """Space out requests to one host by RSS_HOST_MIN_INTERVAL."""
+        host = urlsplit(url).netloc
+        with self._host_lock:
+            now = time.monotonic()
+            start = max(now, self._host_next_request.get(host, now))
+            self._host_next_request[host] = start + RSS_HOST_MIN_INTERVAL
+        if start > now:
+            time.sleep(start - now)
+    
     def fetch_from_mock_data(self, file_path: str) -> List[Dict]:
         """Fetch news from mock JSON file."""
-        import json
-        
         try:
-            with open(file_path, 'r') as f:
-                articles = json.load(f)
-            return articles
+            return load_mock_articles(file_path)
         except Exception as e:
             logger.error(f"Error loading mock data: {e}")
             return []
@@ -58,12 +123,10 @@ class NewsIngestionService:
     def _parse_date(self, date_str: str) -> str:
         """Parse date string to ISO format."""
         try:
-            # Try parsing with feedparser's date parser
-            import feedparser
-            parsed = feedparser._parse_date(date_str)
+            parsed = _parse_feed_date(date_str)
             if parsed:
-                return datetime(*parsed[:6]).isoformat()
-        except:
+                return parsed
+        except Exception:
             pass
         
         return datetime.utcnow().isoformat()
@@ -74,39 +137,81 @@ class NewsIngestionService:
         
         if use_mock:
             # Use mock data for demo
-            mock_path = "data/mock_news.json"
-            articles = self.fetch_from_mock_data(mock_path)
+            articles = self.fetch_from_mock_data(MOCK_DATA_PATH)
             all_articles.extend(articles)
         else:
-            # Poll real RSS feeds
-            for source_name, rss_url in self.sources.items():
-                articles = self.fetch_from_rss(rss_url, source_name)
-                all_articles.extend(articles)
-                time.sleep(1)  # Rate limiting
+            # Poll real RSS feeds concurrently; rate limiting is per host
+            with ThreadPoolExecutor(max_workers=len(self.sources)) as executor:
+                results = executor.map(
+                    lambda source: self.fetch_from_rss(source[1], source[0]),
+                    self.sources.items()
+                )
+                for articles in results:
+                    all_articles.extend(articles)
         
         return all_articles
     
+    def poll_source(self, source_name: str) -> List[Dict]:
+        """Poll a single RSS source for new articles."""
+        return self.fetch_from_rss(self.sources[source_name], source_name)
+    
     def start_periodic_polling(
         self,
         interval_seconds: int = 3600,
         callback=None,
-        use_mock: bool = True
+        use_mock: bool = True,
+        source_intervals: Optional[Dict[str, int]] = None
     ):
-        """Start periodic polling of news sources."""
-        import threading
+        """
+        Start periodic polling of news sources.
+        
+        One scheduler thread drives every job. With real feeds each source is
+        its own job, polled every source_intervals[name] seconds (default
+        interval_seconds) and delivering its articles to callback on its own;
+        a failing source doesn't hold up the others.
+        """
+        if use_mock:
+            jobs = {'mock': (interval_seconds, lambda: self.poll_sources(use_mock=True))}
+        else:
+            source_intervals = source_intervals or {}
+            jobs = {
+                name: (
+                    source_intervals.get(name, interval_seconds),
+                    lambda name=name: self.poll_source(name)
+                )
+                for name in self.sources
+            }
         
-        def poll_loop():
-            while True:
-                try:
-                    articles = self.poll_sources(use_mock=use_mock)
-                    if callback:
-                        callback(articles)
-                except Exception as e:
-                    logger.error(f"Error in polling loop: {e}")
-                
-                time.sleep(interval_seconds)
+        self._poll_stop = threading.Event()
+        self._poll_scheduler = sched.scheduler(time.monotonic, self._poll_stop.wait)
         
-        thread = threading.Thread(target=poll_loop, daemon=True)
+        def run_job(name, interval, poll):
+            try:
+                articles = poll()
+                if callback:
+                    callback(articles)
+            except Exception as e:
+                logger.error(f"Error polling {name}: {e}")
+            
+            if not self._poll_stop.is_set():
+                self._poll_scheduler.enter(interval, 0, run_job, (name, interval, poll))
+        
+        for name, (interval, poll) in jobs.items():
+            self._poll_scheduler.enter(0, 0, run_job, (name, interval, poll))
+        
+        thread = threading.Thread(target=self._poll_scheduler.run, daemon=True)
         thread.start()
         return thread
-
+    
+    def stop_periodic_polling(self):
+        """Stop the scheduler started by start_periodic_polling."""
+        scheduler = getattr(self, '_poll_scheduler', None)
+        if scheduler is None:
+            return
+        
+        self._poll_stop.set()
+        for event in scheduler.queue:
+            try:
+                scheduler.cancel(event)
+            except ValueError:
+                pass  # Already ran
@@ -1,13 +1,20 @@
 """Query service for context-aware news retrieval."""
-from typing import List, Dict, Optional
+import copy
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
 from src.utils.embeddings import find_similar_articles
 from src.services.entity_extraction_service import EntityExtractionService
 from src.services.impact_mapping_service import ImpactMappingService
+from src.services.article_index import ArticleIndex
 from src.utils.stock_mapper import map_company_to_stock, map_sector_to_stocks
 import logging
 
 logger = logging.getLogger(__name__)
 
+QUERY_CACHE_MAX_ENTRIES = 1024
+QUERY_CACHE_TTL_SECONDS = 7 * 24 * 3600  # 7 days
+
 
 class QueryService:
     """Service for context-aware query processing."""
@@ -15,6 +22,10 @@ class QueryService:
     def __init__(self):
         self.entity_extractor = EntityExtractionService()
         self.impact_mapper = ImpactMappingService()
+        # Token index over the articles seen so far, for substring mention checks
+        self.article_index = ArticleIndex()
+        # normalized query -> (entities, intent, timestamp)
+        self._analysis_cache: "OrderedDict[str, Tuple[Dict, str, float]]" = OrderedDict()
     
     def process_query(
         self,
@@ -29,15 +40,12 @@ class QueryService:
             query: Natural language query
             news_articles: List of news articles
             stock_impacts_db: Optional pre-computed stock impacts mapping
-            
+        
         Returns:
             Dictionary with relevant news articles and metadata
         """
-        # Extract entities from query
-        query_entities = self.entity_extractor.extract_entities(query)
-        
-        # Determine query intent
-        query_intent = self._determine_query_intent(query, query_entities)
+        # Extract entities and determine intent (cached per query string)
+        query_entities, query_intent = self._analyze_query(query)
         
         # Find relevant articles
         relevant_articles = self._find_relevant_articles(
@@ -56,24 +64,82 @@ class QueryService:
             'count': len(relevant_articles)
         }
     
+    def candidate_filter(self, query: str) -> Optional[Tuple[List[str], List[str]]]:
+        """
+        Describe which articles a query can match, so callers can pre-filter.
+        
+        Returns:
+            (terms, symbols): every relevant article mentions one of the terms
+            in its title or content (case-insensitively) or has a stock impact
+            on one of the symbols. None when all articles must be scanned,
+            as for semantic search.
+        """
+        query_entities, query_intent = self._analyze_query(query)
+        
+        if query_intent == 'company_specific':
+            companies = [e['name'] for e in query_entities.get('companies', [])]
+            return companies, sorted(self._target_stocks(query_entities))
+        if query_intent == 'sector_wide':
+            return [e['name'] for e in query_entities.get('sectors', [])], []
+        if query_intent == 'regulator_specific':
+            return [e['name'] for e in query_entities.get('regulators', [])], []
+        return None
+    
+    def _target_stocks(self, query_entities: Dict) -> set:
+        """Stock symbols for the companies and sectors named in a query."""
+        target_stocks = set()
+        for company in query_entities.get('companies', []):
+            stocks = map_company_to_stock(company['name'])
+            target_stocks.update([s[0] for s in stocks])
+        
+        for sector in query_entities.get('sectors', []):
+            stocks = map_sector_to_stocks(sector['name'])
+            target_stocks.update([s[0] for s in stocks])
+        
+        return target_stocks
+    
+    def _analyze_query(self, query: str) -> Tuple[Dict, str]:
+        """
+        Return the query's entities and intent, reusing earlier results for repeats.
+        
+        The query is analyzed with its whitespace collapsed, the same form the
+        cache is keyed on, so spacing variants share one consistent result.
+        """
+        key = ' '.join(query.split())
+        cached = self._analysis_cache.get(key)
+        
+        if cached is not None and time.time() - cached[2] <= QUERY_CACHE_TTL_SECONDS:
+            self._analysis_cache.move_to_end(key)
+            entities, intent = cached[0], cached[1]
+        else:
+            entities = self.entity_extractor.extract_entities(key)
+            intent = self._determine_query_intent(key, entities)
+            self._analysis_cache[key] = (entities, intent, time.time())
+            self._analysis_cache.move_to_end(key)
+            while len(self._analysis_cache) > QUERY_CACHE_MAX_ENTRIES:
+                self._analysis_cache.popitem(last=False)
+        
+        # Callers get their own copy so they can't corrupt the cache
+        return copy.deepcopy(entities), intent
+    
     def _determine_query_intent(self, query: str, entities: Dict) -> str:
         """Determine the intent of the query."""
-        query_lower = query.lower()
+        query_folded = query.casefold()
         
         # Check for specific patterns
-        if any(company['name'].lower() in query_lower for company in entities.get('companies', [])):
-            return 'company_specific'
-        
-        if any(sector['name'].lower() in query_lower for sector in entities.get('sectors', [])):
-            return 'sector_wide'
+        for entity_type, intent in (
+            ('companies', 'company_specific'),
+            ('sectors', 'sector_wide'),
+            ('regulators', 'regulator_specific')
+        ):
+            names = tuple(e['name'].casefold() for e in entities.get(entity_type, []))
+            if any(name in query_folded for name in names):
+                return intent
         
-        if any(reg['name'].lower() in query_lower for reg in entities.get('regulators', [])):
-            return 'regulator_specific'
-        
-        if 'sector' in query_lower or 'industry' in query_lower:
+        if 'sector' in query_folded or 'industry' in query_folded:
             return 'sector_wide'
         
-        if 'rate' in query_lower or 'interest' in query_lower or 'policy' in query_lower:
+        if 'rate' in query_folded or 'interest' in query_folded or 'policy' in query_folded:
             return 'thematic'
         
         return 'general'
@@ -87,22 +153,13 @@ class QueryService:
         stock_impacts_db: Optional[Dict] = None
     ) -> List[Dict]:
         """Find relevant articles based on query intent and entities."""
-        relevant = []
-        
         # Extract target companies/sectors from query
         target_companies = [e['name'] for e in query_entities.get('companies', [])]
         target_sectors = [e['name'] for e in query_entities.get('sectors', [])]
         target_regulators = [e['name'] for e in query_entities.get('regulators', [])]
         
         # Get target stock symbols
-        target_stocks = set()
-        for company in target_companies:
-            stocks = map_company_to_stock(company)
-            target_stocks.update([s[0] for s in stocks])
-        
-        for sector in target_sectors:
-            stocks = map_sector_to_stocks(sector)
-            target_stocks.update([s[0] for s in stocks])
+        target_stocks = self._target_stocks(query_entities)
         
         # Find articles based on intent
         if query_intent == 'company_specific':
@@ -133,15 +190,16 @@ class QueryService:
                 news_articles
             )
         
-        # Remove duplicates and sort by relevance
-        seen_ids = set()
-        unique_relevant = []
-        for article in relevant:
-            if article['id'] not in seen_ids:
-                seen_ids.add(article['id'])
-                unique_relevant.append(article)
-        
-        return unique_relevant
+        # The finders key their results by article ID, so repeats are already gone
+        return list(relevant.values())
+    
+    def _find_mentions(self, terms: List[str], news_articles: List[Dict]) -> set:
+        """IDs of articles whose title or content mentions any term, ignoring case."""
+        self.article_index.sync(news_articles)
+        mentioned = set()
+        for term in terms:
+            mentioned |= self.article_index.find(term)
+        return mentioned
     
     def _find_company_articles(
         self,
@@ -149,72 +207,44 @@ class QueryService:
         target_stocks: set,
         news_articles: List[Dict],
         stock_impacts_db: Optional[Dict]
-    ) -> List[Dict]:
-        """Find articles related to specific companies."""
-        relevant = []
-        
-        for article in news_articles:
-            article_text = f"{article.get('title', '')} {article.get('content', '')}"
-            
-            # Check for direct mentions
-            for company in companies:
-                if company.lower() in article_text.lower():
-                    relevant.append(article)
-                    break
-            
-            # Check stock impacts if available
-            if stock_impacts_db and article['id'] in stock_impacts_db:
-                article_stocks = {imp['symbol'] for imp in stock_impacts_db[article['id']]}
-                if article_stocks.intersection(target_stocks):
-                    if article not in relevant:
-                        relevant.append(article)
-        
-        return relevant
+    ) -> Dict[str, Dict]:
+        """Find articles related to specific companies, keyed by ID."""
+        # Direct mentions, plus articles with a stock impact on a target stock
+        relevant_ids = self._find_mentions(companies, news_articles)
+        if stock_impacts_db and target_stocks:
+            relevant_ids |= {
+                article_id
+                for article_id, impacts in stock_impacts_db.items()
+                if any(imp['symbol'] in target_stocks for imp in impacts)
+            }
+        
+        return self._by_id(article for article in news_articles if article['id'] in relevant_ids)
     
     def _find_sector_articles(
         self,
         sectors: List[str],
         news_articles: List[Dict],
         stock_impacts_db: Optional[Dict]
-    ) -> List[Dict]:
-        """Find articles related to sectors."""
-        relevant = []
-        
-        for article in news_articles:
-            article_text = f"{article.get('title', '')} {article.get('content', '')}"
-            
-            # Check for sector mentions
-            for sector in sectors:
-                if sector.lower() in article_text.lower():
-                    relevant.append(article)
-                    break
-        
-        return relevant
+    ) -> Dict[str, Dict]:
+        """Find articles related to sectors, keyed by ID."""
+        mentioned = self._find_mentions(sectors, news_articles)
+        return self._by_id(article for article in news_articles if article['id'] in mentioned)
     
     def _find_regulator_articles(
         self,
         regulators: List[str],
         news_articles: List[Dict]
-    ) -> List[Dict]:
-        """Find articles related to regulators."""
-        relevant = []
-        
-        for article in news_articles:
-            article_text = f"{article.get('title', '')} {article.get('content', '')}"
-            
-            for regulator in regulators:
-                if regulator.upper() in article_text.upper():
-                    relevant.append(article)
-                    break
-        
-        return relevant
+    ) -> Dict[str, Dict]:
+        """Find articles related to regulators, keyed by ID."""
+        mentioned = self._find_mentions(regulators, news_articles)
+        return self._by_id(article for article in news_articles if article['id'] in mentioned)
     
     def _find_thematic_articles(
         self,
         query: str,
         news_articles: List[Dict]
-    ) -> List[Dict]:
-        """Find articles using semantic search."""
+    ) -> Dict[str, Dict]:
+        """Find articles using semantic search, keyed by ID (most similar first)."""
         article_texts = [
             f"{a.get('title', '')} {a.get('content', '')}"
             for a in news_articles
@@ -222,5 +252,13 @@ class QueryService:
         
         similar_indices = find_similar_articles(query, article_texts, threshold=0.7)
         
-        return [news_articles[idx] for idx, _ in similar_indices]
+        return self._by_id(news_articles[idx] for idx, _ in similar_indices)
+    
+    @staticmethod
+    def _by_id(articles) -> Dict[str, Dict]:
+        """Key articles by ID in order, keeping the first of any repeated ID."""
+        relevant_by_id = {}
+        for article in articles:
+            relevant_by_id.setdefault(article['id'], article)
+        return relevant_by_id
 
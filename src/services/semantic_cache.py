@@ -0,0 +1,176 @@
+"""Semantic cache for articles that have already been deduplicated."""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional
+import numpy as np
+from src.utils.embeddings import get_embeddings
+from src.services._simlib import normalize_rows
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIMILARITY_THRESHOLD = 0.92  # Cosine similarity for a semantic cache hit
+CACHE_MAX_ENTRIES = 10000
+CACHE_TTL_SECONDS = 7 * 24 * 3600  # 7 days
+
+
+def content_key(article: Dict) -> str:
+    """Hash an article's title and content into a 128-bit cache key."""
+    text = f"{article.get('title', '')} {article.get('content', '')}"
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class SemanticCache:
+    """
+    LRU cache mapping previously seen articles to their unique story ID.
+    
+    Exact repeats are found by content hash. Near-repeats are found by cosine
+    similarity against the embeddings of cached articles. Embeddings live in
+    one persistent matrix, a row per entry, updated as entries are added and
+    evicted; entries cached without a vector are embedded once a semantic
+    lookup actually needs them.
+    """
+    
+    def __init__(
+        self,
+        similarity_threshold: float = CACHE_SIMILARITY_THRESHOLD,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        ttl_seconds: float = CACHE_TTL_SECONDS
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> {'unique_id', 'text', 'row', 'timestamp'}
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        # Row i of _matrix is the unit embedding of _row_entries[i]; free rows hold None
+        self._matrix: Optional[np.ndarray] = None
+        self._row_entries: List[Optional[Dict]] = []
+        self._free_rows: List[int] = []
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, article: Dict) -> Optional[str]:
+        """Return the cached unique ID for an exact repeat of an article."""
+        key = content_key(article)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        if self._is_expired(entry):
+            self._release(self._entries.pop(key))
+            return None
+        
+        self._entries.move_to_end(key)
+        return entry['unique_id']
+    
+    def lookup_similar(
+        self,
+        articles: List[Dict],
+        vectors: Optional[np.ndarray] = None
+    ) -> List[Optional[str]]:
+        """
+        Find cached unique IDs for articles that are near-repeats of cached ones.
+        
+        Args:
+            articles: Articles to look up
+            vectors: Optional embeddings of the articles, row for row
+        
+        Returns:
+            List aligned with articles; None where no cached article is similar enough
+        """
+        self._evict_expired()
+        if not articles or not self._entries:
+            return [None] * len(articles)
+        
+        self._fill_vectors()
+        
+        if vectors is None:
+            texts = [f"{a.get('title', '')} {a.get('content', '')}" for a in articles]
+            vectors = get_embeddings(texts)
+        query_matrix = np.asarray(vectors, dtype=np.float32)
+        
+        similarities = query_matrix @ self._matrix[:len(self._row_entries)].T
+        # Rows freed by eviction keep stale vectors; never let them match
+        similarities[:, self._free_rows] = -np.inf
+        best = similarities.argmax(axis=1)
+        
+        results = []
+        for row, col in enumerate(best):
+            if similarities[row, col] >= self.similarity_threshold:
+                results.append(self._row_entries[col]['unique_id'])
+            else:
+                results.append(None)
+        return results
+    
+    def put(self, article: Dict, unique_id: str, vector: Optional[np.ndarray] = None):
+        """Cache the unique story ID an article was assigned to."""
+        key = content_key(article)
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._release(previous)
+        
+        entry = {
+            'unique_id': unique_id,
+            'text': f"{article.get('title', '')} {article.get('content', '')}",
+            'row': None,
+            'timestamp': time.time()
+        }
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._release(self._entries.popitem(last=False)[1])
+        
+        if vector is not None:
+            self._store_vectors([entry], np.asarray(vector)[None, :])
+    
+    def clear(self):
+        """Drop all cached entries."""
+        self._entries.clear()
+        self._matrix = None
+        self._row_entries = []
+        self._free_rows = []
+    
+    def _is_expired(self, entry: Dict) -> bool:
+        return time.time() - entry['timestamp'] > self.ttl_seconds
+    
+    def _evict_expired(self):
+        expired = [key for key, entry in self._entries.items() if self._is_expired(entry)]
+        for key in expired:
+            self._release(self._entries.pop(key))
+    
+    def _fill_vectors(self):
+        """Compute embeddings for cached entries that don't have one yet."""
+        missing = [entry for entry in self._entries.values() if entry['row'] is None]
+        if not missing:
+            return
+        
+        vectors = get_embeddings([entry['text'] for entry in missing])
+        self._store_vectors(missing, vectors)
+    
+    def _store_vectors(self, entries: List[Dict], vectors: np.ndarray):
+        """Write normalized vectors into free matrix rows, growing the matrix when full."""
+        vectors = normalize_rows(vectors)
+        for entry, vector in zip(entries, vectors):
+            if self._free_rows:
+                row = self._free_rows.pop()
+            else:
+                row = len(self._row_entries)
+                if self._matrix is None or row == len(self._matrix):
+                    grown = np.empty((max(2 * row, 64), len(vector)), dtype=np.float32)
+                    if row:
+                        grown[:row] = self._matrix
+                    self._matrix = grown
+                self._row_entries.append(None)
+            self._matrix[row] = vector
+            self._row_entries[row] = entry
+            entry['row'] = row
+    
+    def _release(self, entry: Dict):
+        """Free the matrix row of an evicted entry."""
+        row = entry['row']
+        if row is None:
+            return
+        self._row_entries[row] = None
+        self._free_rows.append(row)
+        entry['row'] = None
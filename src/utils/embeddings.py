@@ -1,40 +1,222 @@
 """Embedding service for semantic similarity."""
+import hashlib
+import logging
 import os
+import sqlite3
+import threading
+from collections import OrderedDict
 from sentence_transformers import SentenceTransformer
 import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+logger = logging.getLogger(__name__)
 
 # Initialize the embedding model
 EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"  # Fast and efficient
+EMBEDDING_BATCH_SIZE = 64
 _embedding_model = None
+_embedding_model_lock = threading.Lock()
+
+# "onnx" serves the dynamically INT8-quantized ONNX export of the model
+# (VNNI kernels on AVX-512 CPUs); "torch" runs the FP32 PyTorch weights
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "onnx")
+EMBEDDING_ONNX_FILE = "onnx/model_qint8_avx512_vnni.onnx"  # Published with the model
+
+# Embeddings are cached by content hash in memory. Set EMBEDDING_CACHE_PATH
+# (e.g. ./.cache/embeddings.sqlite) to also keep them on disk across runs.
+EMBEDDING_CACHE_MAX_ENTRIES = 50000
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "")
+
+_embedding_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+_embedding_cache_lock = threading.Lock()  # Guards LRU reads and updates across threads
+_embedding_store = None
+_embedding_store_lock = threading.Lock()
+
+# Approximate nearest-neighbour search (FAISS HNSW) for large corpora
+ANN_MIN_ARTICLES = 20000  # Smaller corpora are scored exactly with one matmul
+ANN_HNSW_M = 32
+ANN_EF_CONSTRUCTION = 200
+ANN_EF_SEARCH = 128
+ANN_INITIAL_K = 64  # Neighbours fetched first; grown while all clear the threshold
+
+# HNSW index over the last large corpus searched; row i holds _ann_keys[i]
+_ann_index = None
+_ann_keys: List[bytes] = []
+_ann_lock = threading.Lock()
 
 
 def get_embedding_model():
     """Get or initialize the embedding model."""
     global _embedding_model
-    if _embedding_model is None:
-        _embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    if _embedding_model is not None:
+        return _embedding_model
+    
+    with _embedding_model_lock:
+        # Another thread may have loaded the model while we waited
+        if _embedding_model is not None:
+            return _embedding_model
+        
+        model = None
+        if _effective_backend() == "onnx":
+            try:
+                model = SentenceTransformer(
+                    EMBEDDING_MODEL_NAME,
+                    backend="onnx",
+                    model_kwargs={"file_name": EMBEDDING_ONNX_FILE}
+                )
+            except Exception as e:
+                logger.warning(f"Falling back to the PyTorch embedding model: {e}")
+        if model is None:
+            model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        _embedding_model = model
     return _embedding_model
 
 
+def _effective_backend() -> str:
+    """The configured backend, or "torch" when onnxruntime isn't installed."""
+    if EMBEDDING_BACKEND == "onnx" and onnxruntime is not None:
+        return "onnx"
+    return "torch"
+
+
+def _text_key(text: str) -> bytes:
+    """128-bit BLAKE2b digest of a text, scoped to the embedding model and backend."""
+    return hashlib.blake2b(
+        f"{EMBEDDING_MODEL_NAME}\x00{_effective_backend()}\x00{text}".encode('utf-8'),
+        digest_size=16
+    ).digest()
+
+
+def _get_embedding_store() -> Optional[sqlite3.Connection]:
+    """Open the on-disk embedding store on first use (None when disabled)."""
+    global _embedding_store
+    if _embedding_store is None and EMBEDDING_CACHE_PATH:
+        directory = os.path.dirname(EMBEDDING_CACHE_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _embedding_store = sqlite3.connect(EMBEDDING_CACHE_PATH, check_same_thread=False)
+        _embedding_store.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+    return _embedding_store
+
+
+def _load_stored(keys: List[bytes]) -> dict:
+    """Fetch stored vectors for the given keys from disk."""
+    stored = {}
+    with _embedding_store_lock:
+        store = _get_embedding_store()
+        if store is None:
+            return stored
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            rows = store.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            for key, vector in rows:
+                stored[key] = np.frombuffer(vector, dtype=np.float32)
+    return stored
+
+
+def _save_stored(items: List[Tuple[bytes, np.ndarray]]):
+    """Persist freshly computed vectors to disk."""
+    with _embedding_store_lock:
+        store = _get_embedding_store()
+        if store is None:
+            return
+        with store:
+            store.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, vector.tobytes()) for key, vector in items]
+            )
+
+
+def _remember(key: bytes, vector: np.ndarray):
+    """Add a vector to the in-memory LRU."""
+    with _embedding_cache_lock:
+        _embedding_cache[key] = vector
+        _embedding_cache.move_to_end(key)
+        while len(_embedding_cache) > EMBEDDING_CACHE_MAX_ENTRIES:
+            _embedding_cache.popitem(last=False)
+
+
 def get_embeddings(texts: List[str]) -> np.ndarray:
-    """Get embeddings for a list of texts."""
-    model = get_embedding_model()
-    return model.encode(texts, convert_to_numpy=True)
+    """
+    Get L2-normalized embeddings for a list of texts.
+    
+    Each distinct text is embedded once: repeats are served from the
+    in-memory LRU or the on-disk store, and only new texts reach the model.
+    Vectors are normalized when encoded and cached in that form, so callers
+    can score cosine similarity as a plain dot product.
+    """
+    return _embed([_text_key(text) for text in texts], texts)
+
+
+def _embed(keys: List[bytes], texts: List[str]) -> np.ndarray:
+    """Embeddings for texts whose cache keys are already computed."""
+    vectors = {}
+    with _embedding_cache_lock:
+        for key in keys:
+            vector = _embedding_cache.get(key)
+            if vector is not None:
+                _embedding_cache.move_to_end(key)
+                vectors[key] = vector
+    
+    missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+    if missing:
+        for key, vector in _load_stored(missing).items():
+            _remember(key, vector)
+            vectors[key] = vector
+    
+    # Encode each remaining distinct text once
+    to_encode = {}
+    for key, text in zip(keys, texts):
+        if key not in vectors:
+            to_encode.setdefault(key, text)
+    if to_encode:
+        encoded = get_embedding_model().encode(
+            list(to_encode.values()),
+            batch_size=EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).astype(np.float32)
+        fresh = list(zip(to_encode, encoded))
+        for key, vector in fresh:
+            _remember(key, vector)
+            vectors[key] = vector
+        _save_stored(fresh)
+    
+    if not keys:
+        return np.empty((0, get_embedding_model().get_sentence_embedding_dimension()), dtype=np.float32)
+    return np.stack([vectors[key] for key in keys])
 
 
 def compute_similarity(text1: str, text2: str) -> float:
     """Compute cosine similarity between two texts."""
-    model = get_embedding_model()
-    embeddings = model.encode([text1, text2], convert_to_numpy=True)
+    embeddings = get_embeddings([text1, text2])
     
-    # Cosine similarity
-    dot_product = np.dot(embeddings[0], embeddings[1])
-    norm1 = np.linalg.norm(embeddings[0])
-    norm2 = np.linalg.norm(embeddings[1])
+    if simsimd is not None:
+        # SIMD kernel; returns cosine distance
+        return 1.0 - float(simsimd.cosine(embeddings[0], embeddings[1]))
     
-    similarity = dot_product / (norm1 * norm2)
-    return float(similarity)
+    # Embeddings are unit length, so cosine similarity is a dot product
+    return float(np.einsum('i,i->', embeddings[0], embeddings[1]))
 
 
 def find_similar_articles(
@@ -42,23 +224,63 @@ def find_similar_articles(
     article_texts: List[str],
     threshold: float = 0.85
 ) -> List[Tuple[int, float]]:
-    """Find articles similar to query text."""
-    model = get_embedding_model()
-    query_embedding = model.encode([query_text], convert_to_numpy=True)[0]
-    article_embeddings = model.encode(article_texts, convert_to_numpy=True)
+    """
+    Find articles similar to query text.
     
-    # Compute similarities
-    similarities = []
-    for idx, article_emb in enumerate(article_embeddings):
-        dot_product = np.dot(query_embedding, article_emb)
-        norm1 = np.linalg.norm(query_embedding)
-        norm2 = np.linalg.norm(article_emb)
-        similarity = dot_product / (norm1 * norm2)
-        
-        if similarity >= threshold:
-            similarities.append((idx, float(similarity)))
+    Corpora of ANN_MIN_ARTICLES or more are searched approximately through
+    an HNSW index when FAISS is installed; smaller ones are scored exactly.
+    """
+    if not article_texts:
+        return []
     
-    # Sort by similarity (descending)
-    similarities.sort(key=lambda x: x[1], reverse=True)
-    return similarities
+    query_embedding = get_embeddings([query_text])[0]
+    article_keys = [_text_key(text) for text in article_texts]
+    
+    if faiss is not None and len(article_texts) >= ANN_MIN_ARTICLES:
+        return _search_ann(query_embedding, article_keys, article_texts, threshold)
+    
+    article_embeddings = _embed(article_keys, article_texts)
+    
+    # Score every article in one matrix-vector product
+    similarities = article_embeddings @ query_embedding
+    
+    # Keep those above the threshold, most similar first
+    idx = np.flatnonzero(similarities >= threshold)
+    order = idx[np.argsort(-similarities[idx], kind='stable')]
+    return list(zip(order.tolist(), similarities[order].tolist()))
+
 
+def _search_ann(
+    query_embedding: np.ndarray,
+    article_keys: List[bytes],
+    article_texts: List[str],
+    threshold: float
+) -> List[Tuple[int, float]]:
+    """Threshold search over an HNSW index kept in step with the corpus."""
+    global _ann_index, _ann_keys
+    
+    with _ann_lock:
+        # Reuse the index while the corpus only grows at the end (new
+        # articles are appended); anything else rebuilds it
+        indexed = len(_ann_keys)
+        if _ann_index is None or article_keys[:indexed] != _ann_keys:
+            _ann_index = faiss.IndexHNSWFlat(len(query_embedding), ANN_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            _ann_index.hnsw.efConstruction = ANN_EF_CONSTRUCTION
+            _ann_keys = []
+            indexed = 0
+        if len(article_keys) > indexed:
+            _ann_index.add(_embed(article_keys[indexed:], article_texts[indexed:]))
+            _ann_keys = list(article_keys)
+        
+        # Widen the search until the weakest neighbour falls below the threshold
+        query = query_embedding.reshape(1, -1).astype(np.float32)
+        k = min(ANN_INITIAL_K, len(article_keys))
+        while True:
+            _ann_index.hnsw.efSearch = max(ANN_EF_SEARCH, k)
+            similarities, indices = _ann_index.search(query, k)
+            if k == len(article_keys) or similarities[0, -1] < threshold:
+                break
+            k = min(k * 4, len(article_keys))
+    
+    keep = (indices[0] >= 0) & (similarities[0] >= threshold)
+    return list(zip(indices[0][keep].tolist(), similarities[0][keep].tolist()))
@@ -1,6 +1,13 @@
 """Stock mapping utilities - maps company names to stock symbols."""
 import re
-from typing import Dict, List, Tuple
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 # Indian stock market mapping
 STOCK_MAP = {
@@ -18,6 +25,7 @@ STOCK_MAP = {
     # IT Sector
     "TCS": ("TCS", 1.0, "direct"),
     "Tata Consultancy Services": ("TCS", 1.0, "direct"),
+    "Tata Consultancy": ("TCS", 1.0, "direct"),
     "Infosys": ("INFY", 1.0, "direct"),
     "Wipro": ("WIPRO", 1.0, "direct"),
     "HCL Technologies": ("HCLTECH", 1.0, "direct"),
@@ -51,6 +59,70 @@ STOCK_MAP = {
     "Adani": ("ADANIENT", 0.7, "sector"),  # Generic Adani mention
 }
 
+# STOCK_MAP with lowercased keys, in the same order
+_STOCK_MAP_LOWER = tuple((key.lower(), mapping) for key, mapping in STOCK_MAP.items())
+
+
+def _build_key_automaton():
+    """Aho-Corasick automaton from each lowercased STOCK_MAP key to its positions (None without pyahocorasick)."""
+    if ahocorasick is None:
+        return None
+    
+    positions_by_key = {}
+    for i, (key_lower, _) in enumerate(_STOCK_MAP_LOWER):
+        positions_by_key.setdefault(key_lower, []).append(i)
+    
+    automaton = ahocorasick.Automaton()
+    for key_lower, positions in positions_by_key.items():
+        automaton.add_word(key_lower, positions)
+    automaton.make_automaton()
+    return automaton
+
+
+_KEY_AUTOMATON = _build_key_automaton()
+
+
+def _build_key_trie() -> Dict:
+    """Character trie of the lowercased STOCK_MAP keys; a None entry lists the positions of the key ending there."""
+    root = {}
+    for i, (key_lower, _) in enumerate(_STOCK_MAP_LOWER):
+        node = root
+        for ch in key_lower:
+            node = node.setdefault(ch, {})
+        node.setdefault(None, []).append(i)
+    return root
+
+
+# Fallback matcher when pyahocorasick is missing
+_KEY_TRIE = _build_key_trie()
+
+
+def _trie_positions(text: str) -> set:
+    """Positions of the STOCK_MAP keys occurring in a lowercased text, by walking the trie from each offset."""
+    positions = set()
+    for start in range(len(text)):
+        # Offsets whose character starts no key are skipped at once
+        node = _KEY_TRIE.get(text[start])
+        end = start + 1
+        while node is not None:
+            terminal = node.get(None)
+            if terminal:
+                positions.update(terminal)
+            if end == len(text):
+                break
+            node = node.get(text[end])
+            end += 1
+    return positions
+
+
+# Group names that stand for several listed companies (STOCK_MAP keys),
+# used when a name contains no company alias
+COMPANY_GROUPS = {
+    "Tata": ["Tata Consultancy Services", "Tata Motors"],
+}
+
+_COMPANY_GROUPS_LOWER = tuple((group.lower(), tuple(keys)) for group, keys in COMPANY_GROUPS.items())
+
 # Sector mappings
 SECTOR_STOCKS = {
     "Banking": [
@@ -86,6 +158,9 @@ SECTOR_STOCKS = {
     ],
 }
 
+# SECTOR_STOCKS with lowercased names and tuple values, in the same order
+_SECTOR_STOCKS_LOWER = tuple((sector.lower(), tuple(stocks)) for sector, stocks in SECTOR_STOCKS.items())
+
 # Regulator mappings
 REGULATOR_IMPACTS = {
     "RBI": {
@@ -113,37 +188,80 @@ REGULATOR_IMPACTS = {
 }
 
 
-def map_company_to_stock(company_name: str) -> List[Tuple[str, float, str]]:
-    """Map a company name to stock symbol(s) with confidence."""
-    results = []
-    company_lower = company_name.lower()
-    
-    # Direct mapping
-    for key, (symbol, confidence, impact_type) in STOCK_MAP.items():
-        if key.lower() in company_lower or company_lower in key.lower():
-            results.append((symbol, confidence, impact_type))
-    
-    return results if results else []
+MAPPER_CACHE_MAX_ENTRIES = 4096  # Distinct names remembered per mapper
+
+# Shared read-only result for names that match no regulator
+_NO_REGULATOR_IMPACTS = MappingProxyType({"stocks": (), "sectors": ()})
 
 
-def map_sector_to_stocks(sector_name: str) -> List[Tuple[str, float, str]]:
-    """Map a sector to relevant stocks."""
-    sector_lower = sector_name.lower()
+def map_company_to_stock(company_name: str) -> Tuple[Tuple[str, float, str], ...]:
+    """Map a company name to stock symbol(s) with confidence (a shared, immutable result)."""
+    return _map_company_lower(company_name.lower())
+
+
+@lru_cache(maxsize=MAPPER_CACHE_MAX_ENTRIES)
+def _map_company_lower(company_lower: str) -> Tuple[Tuple[str, float, str], ...]:
+    """Cached STOCK_MAP scan for a lowercased company name."""
+    if _KEY_AUTOMATON is None:
+        positions = _trie_positions(company_lower)
+    else:
+        # Every alias inside the name, in one automaton pass
+        positions = set()
+        for _, key_positions in _KEY_AUTOMATON.iter(company_lower):
+            positions.update(key_positions)
+    matches = tuple(_STOCK_MAP_LOWER[i][1] for i in sorted(positions))
     
-    for sector, stocks in SECTOR_STOCKS.items():
-        if sector.lower() in sector_lower or sector_lower in sector.lower():
+    if not matches:
+        # Group mentions such as a bare "Tata"
+        matches = tuple(
+            STOCK_MAP[key]
+            for group_lower, keys in _COMPANY_GROUPS_LOWER
+            if group_lower in company_lower
+            for key in keys
+        )
+    return _merge_by_symbol(matches)
+
+
+def _merge_by_symbol(mappings) -> Tuple[Tuple[str, float, str], ...]:
+    """One mapping per symbol, keeping the highest confidence (first on ties), in first-seen order."""
+    results: Dict[str, Tuple[float, str]] = {}
+    for symbol, confidence, impact_type in mappings:
+        prev = results.get(symbol)
+        if prev is None or confidence > prev[0]:
+            results[symbol] = (confidence, impact_type)
+    return tuple((symbol, confidence, impact_type) for symbol, (confidence, impact_type) in results.items())
+
+
+def map_sector_to_stocks(sector_name: str) -> Tuple[Tuple[str, float, str], ...]:
+    """Map a sector to relevant stocks (a shared, immutable result)."""
+    return _map_sector_lower(sector_name.lower())
+
+
+@lru_cache(maxsize=MAPPER_CACHE_MAX_ENTRIES)
+def _map_sector_lower(sector_lower: str) -> Tuple[Tuple[str, float, str], ...]:
+    """Cached SECTOR_STOCKS scan for a lowercased sector name."""
+    for sector_key, stocks in _SECTOR_STOCKS_LOWER:
+        if sector_key in sector_lower:
             return stocks
     
-    return []
+    return ()
 
 
-def map_regulator_to_impacts(regulator_name: str) -> Dict:
+def map_regulator_to_impacts(regulator_name: str) -> Mapping:
     """Map a regulator to impacted stocks and sectors."""
     regulator_upper = regulator_name.upper()
-    
+    # Callers mostly pass the regulator's own name: one dict probe
+    impacts = REGULATOR_IMPACTS.get(regulator_upper)
+    if impacts is None:
+        impacts = _map_regulator_upper(regulator_upper)
+    return impacts if impacts is not None else _NO_REGULATOR_IMPACTS
+
+
+@lru_cache(maxsize=MAPPER_CACHE_MAX_ENTRIES)
+def _map_regulator_upper(regulator_upper: str) -> Optional[Dict]:
+    """Cached REGULATOR_IMPACTS lookup for an uppercased regulator name."""
     for regulator, impacts in REGULATOR_IMPACTS.items():
-        if regulator in regulator_upper or regulator_upper in regulator:
+        if regulator in regulator_upper:
             return impacts
     
-    return {"stocks": [], "sectors": []}
-
+    return None
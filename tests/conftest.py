@@ -7,7 +7,7 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_articles():
     """Sample articles for testing."""
     return [
@@ -24,7 +24,7 @@ def sample_articles():
     ]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def rbi_duplicate_articles():
     """RBI rate hike articles that should be identified as duplicates."""
     return [
@@ -45,3 +45,26 @@ def rbi_duplicate_articles():
         }
     ]
 
+
+@pytest.fixture(scope="session")
+def client():
+    """One API client for the session; the app's startup runs once."""
+    from fastapi.testclient import TestClient
+    from src.api.main import app
+    
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def entity_service():
+    """Shared entity extraction service; it keeps no per-call state."""
+    from src.services.entity_extraction_service import EntityExtractionService
+    return EntityExtractionService()
+
+
+@pytest.fixture(scope="session")
+def impact_service():
+    """Shared impact mapping service; it keeps no per-call state."""
+    from src.services.impact_mapping_service import ImpactMappingService
+    return ImpactMappingService()
@@ -48,11 +48,61 @@ class TestDeduplicationAgent:
         assert 'duplicates' in result
         assert len(result['unique_stories']) > 0
     
+    def test_identify_duplicates_uses_cache(self, monkeypatch):
+        """Test articles seen in an earlier batch skip the similarity search."""
+        agent = DeduplicationAgent()
+        
+        articles = [
+            {'id': 'N2', 'title': 'RBI increases repo rate', 'content': 'RBI raised the repo rate.'},
+            {'id': 'N5', 'title': 'Reserve Bank hikes rates', 'content': 'The RBI hiked rates.'}
+        ]
+        
+        seen_batches = []
+        
+        def fake_identify_duplicates(batch, vectors=None):
+            seen_batches.append([a['id'] for a in batch])
+            return {batch[0]['id']: [a['id'] for a in batch]} if batch else {}
+        
+        monkeypatch.setattr(agent.service, 'identify_duplicates', fake_identify_duplicates)
+        
+        state: DeduplicationState = {'articles': articles, 'unique_stories': {}, 'duplicates': {}}
+        first = agent.identify_duplicates(state)
+        second = agent.identify_duplicates(state)
+        
+        assert seen_batches == [['N2', 'N5'], []]
+        assert second['duplicates'] == first['duplicates'] == {'N2': ['N2', 'N5']}
+        assert second['unique_stories'].keys() == first['unique_stories'].keys()
+    
+    def test_identify_duplicates_cache_hit_outside_batch(self, monkeypatch):
+        """Test a cache hit on a story from an earlier batch is keyed by an article of this batch."""
+        agent = DeduplicationAgent()
+        
+        articles = [
+            {'id': 'N2', 'title': 'RBI increases repo rate', 'content': 'RBI raised the repo rate.'},
+            {'id': 'N5', 'title': 'Reserve Bank hikes rates', 'content': 'The RBI hiked rates.'},
+            {'id': 'N6', 'title': 'Central bank raises policy rate', 'content': 'The central bank raised rates.'}
+        ]
+        monkeypatch.setattr(
+            agent.service, 'identify_duplicates',
+            lambda batch, vectors=None: {batch[0]['id']: [a['id'] for a in batch]} if batch else {}
+        )
+        agent.identify_duplicates({'articles': articles, 'unique_stories': {}, 'duplicates': {}})
+        
+        result = agent.identify_duplicates({'articles': articles[1:], 'unique_stories': {}, 'duplicates': {}})
+        
+        assert result['duplicates'] == {'N5': ['N5', 'N6']}
+        assert list(result['unique_stories']) == ['N5']
+    
     def test_build_graph(self):
         """Test graph construction."""
         agent = DeduplicationAgent()
         graph = agent.build_graph()
         assert graph is not None
+    
+    def test_get_graph_is_cached(self):
+        """Test the compiled graph is built once and reused."""
+        agent = DeduplicationAgent()
+        assert agent.get_graph() is agent.get_graph()
 
 
 class TestEntityExtractionAgent:
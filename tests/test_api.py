@@ -1,15 +1,11 @@
 """Integration tests for FastAPI endpoints."""
 import pytest
-from fastapi.testclient import TestClient
-from src.api.main import app
-
-client = TestClient(app)
 
 
 class TestAPIEndpoints:
     """Tests for API endpoints."""
     
-    def test_root_endpoint(self):
+    def test_root_endpoint(self, client):
         """Test root endpoint returns API info."""
         response = client.get("/")
         assert response.status_code == 200
@@ -18,7 +14,7 @@ class TestAPIEndpoints:
         assert "version" in data
         assert "endpoints" in data
     
-    def test_query_endpoint(self):
+    def test_query_endpoint(self, client):
         """Test query endpoint."""
         response = client.get("/query?q=HDFC%20Bank%20news")
         assert response.status_code == 200
@@ -27,20 +23,34 @@ class TestAPIEndpoints:
         assert "count" in data
         assert isinstance(data["count"], int)
     
-    def test_query_endpoint_empty(self):
+    def test_query_endpoint_empty(self, client):
         """Test query endpoint with empty query."""
         response = client.get("/query?q=")
         # Should handle gracefully
         assert response.status_code in [200, 400]
     
-    def test_entities_endpoint(self):
+    def test_entities_endpoint(self, client):
         """Test entities endpoint."""
         response = client.get("/entities")
         assert response.status_code == 200
         data = response.json()
         assert isinstance(data, dict)
     
-    def test_deduplication_demo_endpoint(self):
+    @pytest.mark.parametrize("path", ["/query?q=HDFC&limit=0", "/query?q=HDFC&offset=-1", "/entities?limit=-5", "/entities?offset=-1"])
+    def test_paging_parameters_validated(self, client, path):
+        """Test non-positive limits and negative offsets are rejected."""
+        response = client.get(path)
+        assert response.status_code == 422
+    
+    def test_query_candidate_clause_skips_non_ascii_terms(self):
+        """Test non-ASCII terms disable the SQL pre-filter instead of dropping case variants."""
+        from sqlalchemy.sql.elements import True_
+        from src.api.main import _query_candidate_clause
+        
+        assert isinstance(_query_candidate_clause(['Société Générale'], ['GLE']), True_)
+        assert not isinstance(_query_candidate_clause(['HDFC Bank'], ['HDFCBANK']), True_)
+    
+    def test_deduplication_demo_endpoint(self, client):
         """Test deduplication demo endpoint."""
         response = client.get("/deduplication-demo")
         assert response.status_code == 200
@@ -49,7 +59,28 @@ class TestAPIEndpoints:
         assert "unique_stories" in data
         assert "rbi_rate_hike_example" in data
     
-    def test_ingest_endpoint(self):
+    def test_deduplication_demo_etag(self, client, monkeypatch):
+        """Test the demo ETag hashes the payload and revalidates with 304."""
+        import hashlib
+        import src.api.main as main_module
+        
+        monkeypatch.setattr(
+            main_module, '_process_mock_data',
+            lambda mtime_ns: {'duplicates': {'N2': ['N2', 'N5']}, 'unique_stories': {'N2': {'consolidated_title': 'RBI hikes'}}}
+        )
+        main_module._build_deduplication_demo.cache_clear()
+        try:
+            response = client.get("/deduplication-demo")
+            etag = response.headers["etag"]
+            
+            assert response.status_code == 200
+            assert etag == f'"{hashlib.blake2b(response.content, digest_size=16).hexdigest()}"'
+            assert response.json()["all_duplicate_groups"][0]["duplicate_ids"] == ['N2', 'N5']
+            assert client.get("/deduplication-demo", headers={"If-None-Match": etag}).status_code == 304
+        finally:
+            main_module._build_deduplication_demo.cache_clear()
+    
+    def test_ingest_endpoint(self, client):
         """Test ingest endpoint."""
         articles = [
             {
@@ -62,14 +93,14 @@ class TestAPIEndpoints:
         # Should accept the request (may process in background)
         assert response.status_code in [200, 202]
     
-    def test_news_endpoint(self):
+    def test_news_endpoint(self, client):
         """Test get news endpoint."""
         # Try to get a news article (may not exist)
         response = client.get("/news/N1")
         # Should handle gracefully
         assert response.status_code in [200, 404]
     
-    def test_stocks_endpoint(self):
+    def test_stocks_endpoint(self, client):
         """Test stocks endpoint."""
         response = client.get("/stocks/HDFCBANK/news")
         assert response.status_code == 200
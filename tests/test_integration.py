@@ -1,4 +1,5 @@
 """Integration tests for end-to-end workflow."""
+import asyncio
 import pytest
 from src.agents.orchestrator import NewsProcessingOrchestrator
 
@@ -107,4 +108,20 @@ class TestEndToEndWorkflow:
         assert 'articles' in result or len(result) > 0
         assert 'extracted_entities' in result
         assert 'stock_impacts' in result
-
+    
+    def test_process_articles_async(self):
+        """Test the async entry point returns the same pipeline output."""
+        orchestrator = NewsProcessingOrchestrator()
+        
+        articles = [
+            {
+                'id': 'N1',
+                'title': 'HDFC Bank announces 15% dividend, board approves stock buyback',
+                'content': 'HDFC Bank announced a 15% dividend payout to shareholders.'
+            }
+        ]
+        
+        result = asyncio.run(orchestrator.process_articles_async(articles))
+        
+        assert 'N1' in result.get('extracted_entities', {})
+        assert 'N1' in result.get('stock_impacts', {})
@@ -4,6 +4,8 @@ from src.services.deduplication_service import DeduplicationService
 from src.services.entity_extraction_service import EntityExtractionService
 from src.services.impact_mapping_service import ImpactMappingService
 from src.services.query_service import QueryService
+from src.services.semantic_cache import SemanticCache, content_key
+from src.services.article_index import ArticleIndex
 
 
 class TestDeduplicationService:
@@ -51,6 +53,178 @@ class TestDeduplicationService:
         # but the structure should be correct
         assert isinstance(duplicates, dict)
     
+    def test_identify_duplicates_lsh_candidates(self, monkeypatch):
+        """Test LSH candidates are added to, not substituted for, the nearest neighbours."""
+        pytest.importorskip("datasketch")
+        import numpy as np
+        import src.services.deduplication_service as dedup_module
+        
+        # A3 paraphrases A1 with no shared shingles, so only the embeddings link them
+        monkeypatch.setattr(
+            dedup_module, 'get_embeddings',
+            lambda texts: np.array([[0.0, 1.0] if 'ICICI' in text else [1.0, 0.0] for text in texts])
+        )
+        service = DeduplicationService(lsh_min_articles=0)
+        
+        articles = [
+            {'id': 'A1', 'title': 'RBI increases repo rate by 25 basis points', 'content': 'The Reserve Bank of India increased the repo rate by 25 basis points today.'},
+            {'id': 'A2', 'title': 'RBI increases repo rate by 25 basis points', 'content': 'The Reserve Bank of India increased the repo rate by 25 basis points on Friday.'},
+            {'id': 'A3', 'title': 'Central bank hikes policy rate 25bps', 'content': 'Monetary authority tightens in surprise move.'},
+            {'id': 'A4', 'title': 'ICICI Bank opens new branches', 'content': 'ICICI Bank announced opening of new branches across the country.'}
+        ]
+        
+        assert service._lsh_candidates(articles)['A1'] == {'A1', 'A2'}
+        
+        duplicates = service.identify_duplicates(articles)
+        
+        assert duplicates == {'A1': ['A1', 'A2', 'A3'], 'A4': ['A4']}
+    
+    def test_identify_duplicates_exact_matches_skip_embedding(self, monkeypatch):
+        """Test byte-identical articles are grouped without embedding them."""
+        import numpy as np
+        import src.services.deduplication_service as dedup_module
+        
+        embedded = []
+        
+        def fake_embeddings(texts):
+            embedded.extend(texts)
+            return np.eye(len(texts))
+        
+        monkeypatch.setattr(dedup_module, 'get_embeddings', fake_embeddings)
+        service = DeduplicationService()
+        
+        articles = [
+            {'id': 'A1', 'title': 'RBI raises repo rate', 'content': 'The RBI raised the repo rate.'},
+            {'id': 'A2', 'title': 'ICICI Bank opens new branches', 'content': 'ICICI Bank opened branches.'},
+            {'id': 'A3', 'title': 'RBI raises repo rate', 'content': 'The RBI raised the repo rate.'}
+        ]
+        
+        vectors = {}
+        duplicates = service.identify_duplicates(articles, vectors)
+        
+        assert duplicates == {'A1': ['A1', 'A3'], 'A2': ['A2']}
+        assert len(embedded) == 2
+        assert vectors['A3'] is vectors['A1']
+        assert sorted(vectors) == ['A1', 'A2', 'A3']
+    
+    def test_identify_duplicates_beyond_top_k(self, monkeypatch):
+        """Test an article keeps every duplicate when it has more than DEDUP_TOP_K of them."""
+        import numpy as np
+        import src.services.deduplication_service as dedup_module
+        
+        count = dedup_module.DEDUP_TOP_K + 6
+        
+        def fake_embeddings(texts):
+            # Near-copies of one story, slightly perturbed so they are not identical
+            E = np.ones((len(texts), 8)) + np.random.default_rng(0).normal(scale=0.01, size=(len(texts), 8))
+            return E / np.linalg.norm(E, axis=1, keepdims=True)
+        
+        monkeypatch.setattr(dedup_module, 'get_embeddings', fake_embeddings)
+        service = DeduplicationService()
+        
+        articles = [
+            {'id': f'A{i}', 'title': 'RBI raises repo rate', 'content': f'Report {i} on the RBI rate hike.'}
+            for i in range(count)
+        ]
+        
+        duplicates = service.identify_duplicates(articles)
+        
+        assert duplicates == {'A0': [a['id'] for a in articles]}
+    
+    def test_identify_duplicates_int8_matches_float32(self, monkeypatch):
+        """Test int8 scoring groups borderline pairs exactly as FP32 scoring does."""
+        import numpy as np
+        import src.services.deduplication_service as dedup_module
+        
+        # Noisy copies of one vector: hundreds of pairs sit near the 0.85 threshold
+        rng = np.random.default_rng(0)
+        E = rng.normal(size=(1, 384)) + rng.normal(scale=0.42, size=(40, 384))
+        E /= np.linalg.norm(E, axis=1, keepdims=True)
+        monkeypatch.setattr(
+            dedup_module, 'get_embeddings',
+            lambda texts: E[[int(text.split()[0][1:]) for text in texts]]
+        )
+        articles = [{'id': f'A{i}', 'title': f'A{i}', 'content': ''} for i in range(len(E))]
+        
+        quantized = DeduplicationService(quantize=True).identify_duplicates(articles)
+        exact = DeduplicationService(quantize=False).identify_duplicates(articles)
+        
+        assert quantized == exact
+    
+    def test_add_article_streaming(self, monkeypatch):
+        """Test articles added one at a time are grouped as identify_duplicates groups them."""
+        import numpy as np
+        import src.services.deduplication_service as dedup_module
+        
+        # RBI stories lie 30 degrees apart: neighbours match, but A1 and A6 do not
+        angles = {'today': 0, 'Friday': 30, 'Monday': 60}
+        
+        def fake_embeddings(texts):
+            rows = []
+            for text in texts:
+                if 'ICICI' in text:
+                    rows.append([0.0, 0.0, 1.0])
+                else:
+                    angle = np.radians(next(v for k, v in angles.items() if k in text))
+                    rows.append([np.cos(angle), np.sin(angle), 0.0])
+            return np.array(rows)
+        
+        monkeypatch.setattr(dedup_module, 'get_embeddings', fake_embeddings)
+        service = DeduplicationService()
+        
+        rbi = {'id': 'A1', 'title': 'RBI increases repo rate by 25 basis points', 'content': 'The RBI increased the repo rate by 25 basis points today.'}
+        articles = [
+            rbi,
+            {'id': 'A2', 'title': 'ICICI Bank opens new branches', 'content': 'ICICI Bank announced opening of new branches across the country.'},
+            {'id': 'A3', 'title': 'RBI increases repo rate by 25 basis points', 'content': 'The RBI increased the repo rate by 25 basis points on Friday.'},
+            {**rbi, 'id': 'A4'},
+            {'id': 'A5', 'title': 'ICICI Bank opens new branches', 'content': 'ICICI Bank announced opening of new branches across the state.'},
+            {'id': 'A6', 'title': 'RBI increases repo rate by 25 basis points', 'content': 'The RBI increased the repo rate by 25 basis points on Monday.'}
+        ]
+        
+        roots = [service.add_article(a) for a in articles]
+        
+        assert roots == ['A1', 'A2', 'A1', 'A1', 'A2', 'A6']
+        grouped = {}
+        for article, root in zip(articles, roots):
+            grouped.setdefault(root, set()).add(article['id'])
+        assert grouped == {
+            unique_id: set(duplicate_ids)
+            for unique_id, duplicate_ids in service.identify_duplicates(articles).items()
+        }
+        assert service.add_article(articles[2]) == 'A1'
+        
+        service.reset_stream()
+        assert service.add_article(articles[2]) == 'A3'
+    
+    def test_pairwise_cosine_topk(self):
+        """Test the similarity kernel returns each row's nearest neighbours."""
+        import numpy as np
+        from src.services._simlib import normalize_rows, pairwise_cosine_topk
+        
+        E = normalize_rows(np.array([[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]]))
+        
+        indices, similarities = pairwise_cosine_topk(E, 2)
+        
+        assert indices[0].tolist() == [1, 2]
+        assert indices[2].tolist() == [1, 0]
+        assert np.allclose(similarities[0], [E[0] @ E[1], E[0] @ E[2]], atol=1e-5)
+    
+    def test_pairwise_cosine_topk_int8(self):
+        """Test int8-quantized embeddings give the same neighbours as float32."""
+        import numpy as np
+        from src.services._simlib import normalize_rows, quantize_rows, pairwise_cosine_topk
+        
+        E = normalize_rows(np.random.default_rng(0).normal(size=(50, 384)))
+        Q, scales = quantize_rows(E)
+        
+        float_indices, float_sims = pairwise_cosine_topk(E, 3)
+        int8_indices, int8_sims = pairwise_cosine_topk(Q, 3, scales)
+        
+        assert Q.dtype == np.int8
+        assert np.allclose(int8_sims, float_sims, atol=5e-3)
+        assert (int8_indices[:, 0] == float_indices[:, 0]).mean() > 0.9
+    
     def test_consolidate_story(self):
         """Test story consolidation."""
         service = DeduplicationService()
@@ -74,6 +248,69 @@ class TestDeduplicationService:
         assert consolidated is not None
         assert 'consolidated_title' in consolidated
         assert 'consolidated_content' in consolidated
+    
+    def test_consolidate_story_cached(self):
+        """Test an unchanged group is served from the story cache."""
+        service = DeduplicationService()
+        articles = [
+            {'id': 'A1', 'title': 'RBI increases repo rate', 'content': 'The RBI increased rates.'},
+            {'id': 'A2', 'title': 'Reserve Bank hikes rates', 'content': 'The Reserve Bank hiked rates sharply.'}
+        ]
+        
+        first = service.consolidate_story(['A1', 'A2'], articles)
+        first['article_ids'].append('A3')
+        second = service.consolidate_story(['A1', 'A2'], articles)
+        
+        assert len(service._story_cache) == 1
+        assert second['article_ids'] == ['A1', 'A2']
+        assert second['consolidated_content'] == 'The Reserve Bank hiked rates sharply.'
+
+
+class TestSemanticCache:
+    """Tests for Semantic Cache."""
+    
+    def test_exact_hit(self):
+        """Test an exact repeat returns the cached unique ID."""
+        cache = SemanticCache()
+        article = {'id': 'A2', 'title': 'RBI hikes rates', 'content': 'The RBI hiked rates.'}
+        
+        assert cache.get(article) is None
+        cache.put(article, 'A1')
+        
+        assert cache.get(dict(article, id='A9')) == 'A1'
+    
+    def test_expired_and_evicted_entries(self):
+        """Test entries past their TTL or beyond capacity are dropped."""
+        cache = SemanticCache(max_entries=1, ttl_seconds=0)
+        first = {'id': 'A1', 'title': 'First', 'content': 'One'}
+        second = {'id': 'A2', 'title': 'Second', 'content': 'Two'}
+        
+        cache.put(first, 'A1')
+        cache.put(second, 'A2')
+        
+        assert len(cache) == 1
+        assert cache.get(second) is None  # ttl_seconds=0 expires immediately
+    
+    def test_lookup_similar_with_vectors(self):
+        """Test near-repeats are matched on supplied vectors and evicted rows are reused."""
+        import numpy as np
+        
+        cache = SemanticCache(max_entries=2)
+        articles = [
+            {'id': f'A{i}', 'title': f'Story {i}', 'content': f'Body {i}'}
+            for i in range(3)
+        ]
+        for article, vector in zip(articles, np.eye(3)):
+            cache.put(article, article['id'], vector=vector)
+        
+        queries = [{'id': 'B1', 'title': 'Other', 'content': 'Text'}] * 2
+        
+        assert cache.lookup_similar(queries, vectors=np.array([[1.0, 0.0, 0.0], [0.0, 0.1, 1.0]])) == [None, 'A2']
+        assert len(cache._row_entries) == 2
+        
+        # An expired entry's row is freed but still holds its old vector
+        cache._entries[content_key(articles[1])]['timestamp'] = 0
+        assert cache.lookup_similar(queries[:1], vectors=np.array([[0.0, 1.0, 0.0]])) == [None]
 
 
 class TestEntityExtractionService:
@@ -84,33 +321,58 @@ class TestEntityExtractionService:
         service = EntityExtractionService()
         assert service is not None
     
-    def test_extract_entities_hdfc(self):
+    def test_extract_entities_hdfc(self, entity_service):
         """Test entity extraction from HDFC Bank text."""
-        service = EntityExtractionService()
-        
         content = "HDFC Bank announces 15% dividend, board approves stock buyback. The banking sector shows strong growth."
         title = "HDFC Bank dividend announcement"
         
-        entities = service.extract_entities(content, title)
+        entities = entity_service.extract_entities(content, title)
         
         assert isinstance(entities, dict)
         # Should extract HDFC Bank as company
         companies = entities.get('companies', [])
-        assert len(companies) > 0 or 'HDFC' in str(entities).upper()
+        assert any('HDFC' in company['name'].upper() for company in companies)
     
-    def test_extract_entities_rbi(self):
+    def test_extract_entities_rbi(self, entity_service):
         """Test entity extraction from RBI text."""
-        service = EntityExtractionService()
-        
         content = "RBI raises repo rate by 25bps to 6.75%, citing inflation concerns."
         title = "RBI rate hike"
         
-        entities = service.extract_entities(content, title)
+        entities = entity_service.extract_entities(content, title)
         
         assert isinstance(entities, dict)
         # Should extract RBI as regulator
         regulators = entities.get('regulators', [])
-        assert len(regulators) > 0 or 'RBI' in str(entities).upper()
+        assert any('RBI' in regulator['name'].upper() for regulator in regulators)
+    
+    def test_extract_entities_batch_matches_single(self, entity_service):
+        """Test batched extraction returns the same entities as per-article calls."""
+        contents = [
+            "HDFC Bank announces 15% dividend. The banking sector shows strong growth.",
+            "RBI raises repo rate by 25bps to 6.75%, citing inflation concerns.",
+            "",
+            "Société Générale and SBI back the IT sector"
+        ]
+        titles = ["HDFC Bank dividend announcement", "RBI rate hike", "TCS", "Infosys"]
+        
+        batch = entity_service.extract_entities_batch(contents, titles)
+        
+        assert len(batch) == 4
+        for content, title, entities in zip(contents, titles, batch):
+            assert entities == entity_service.extract_entities(content, title)
+    
+    def test_scan_patterns_matches_regex(self, entity_service):
+        """Test the single-pass Hyperscan scan finds what the regexes find."""
+        pytest.importorskip("hyperscan")
+        regexes = [
+            *entity_service._BANK_RX, *entity_service._REGULATOR_RX, *entity_service._COMPANY_RX,
+            *[rx for rx, _ in entity_service._SECTOR_RX]
+        ]
+        
+        text = "hdfc bank and SBI shares rose; RBI,SEBI and Larsen  &  Toubro (L&T) lead the IT sector. xTCS TCS"
+        
+        assert entity_service._scan_patterns(text) == [[m.group() for m in rx.finditer(text)] for rx in regexes]
+        assert entity_service._scan_patterns("Société Générale and SBI") is None
 
 
 class TestImpactMappingService:
@@ -121,16 +383,14 @@ class TestImpactMappingService:
         service = ImpactMappingService()
         assert service is not None
     
-    def test_map_entities_to_stocks_direct(self):
+    def test_map_entities_to_stocks_direct(self, impact_service):
         """Test direct stock mapping."""
-        service = ImpactMappingService()
-        
         entities = {
             'companies': ['HDFC Bank'],
             'sectors': ['Banking']
         }
         
-        impacts = service.map_entities_to_stocks(entities)
+        impacts = impact_service.map_entities_to_stocks(entities)
         
         assert isinstance(impacts, list)
         assert len(impacts) > 0
@@ -139,16 +399,30 @@ class TestImpactMappingService:
         if hdfc_impacts:
             assert hdfc_impacts[0]['confidence'] >= 0.9
     
-    def test_map_entities_to_stocks_sector(self):
-        """Test sector-wide stock mapping."""
-        service = ImpactMappingService()
+    def test_map_entities_to_stocks_company_aliases(self, impact_service):
+        """Test company names are mapped through their STOCK_MAP aliases."""
+        entities = {
+            'companies': [
+                {'name': 'HDFC Bank Ltd', 'confidence': 1.0},
+                {'name': 'Tata', 'confidence': 1.0}
+            ]
+        }
+        
+        impacts = {i['symbol']: i for i in impact_service.map_entities_to_stocks(entities)}
         
+        assert impacts['HDFCBANK']['confidence'] == 1.0
+        assert impacts['HDFCBANK']['impact_type'] == 'direct'
+        # "Tata" is not an alias itself but a group of two listed companies
+        assert {'TCS', 'TATAMOTORS'} <= set(impacts)
+    
+    def test_map_entities_to_stocks_sector(self, impact_service):
+        """Test sector-wide stock mapping."""
         entities = {
             'sectors': ['Banking'],
             'regulators': []
         }
         
-        impacts = service.map_entities_to_stocks(entities)
+        impacts = impact_service.map_entities_to_stocks(entities)
         
         assert isinstance(impacts, list)
         # Should have multiple banking stocks with lower confidence
@@ -221,4 +495,164 @@ class TestQueryService:
         
         assert 'relevant_articles' in result
         assert result['count'] >= 2  # Should return both banking articles
+    
+    def test_process_query_caches_analysis(self, monkeypatch):
+        """Test repeated queries reuse the cached entities and intent."""
+        service = QueryService()
+        calls = []
+        extract = service.entity_extractor.extract_entities
+        monkeypatch.setattr(
+            service.entity_extractor,
+            'extract_entities',
+            lambda text, title="": calls.append(text) or extract(text, title)
+        )
+        articles = [{'id': 'N1', 'title': 'HDFC Bank news', 'content': 'HDFC Bank announced dividend.'}]
+        
+        first = service.process_query("HDFC Bank news", articles)
+        second = service.process_query("HDFC  Bank news ", articles)
+        
+        assert calls == ["HDFC Bank news"]
+        assert second['query_intent'] == first['query_intent']
+        assert second['extracted_entities'] == first['extracted_entities']
+    
+    def test_process_query_spacing_variants_agree(self):
+        """Test a cached spacing variant doesn't leak its spacing into later queries."""
+        service = QueryService()
+        articles = [{'id': 'N1', 'title': 'HDFC Bank news', 'content': 'HDFC Bank announced dividend.'}]
+        
+        service.process_query("HDFC  Bank news", articles)
+        result = service.process_query("HDFC Bank news", articles)
+        
+        assert [c['name'] for c in result['extracted_entities']['companies']] == ['HDFC Bank']
+        assert result['count'] == 1
+    
+    def test_candidate_filter(self):
+        """Test the pre-filter covers every article the query matches."""
+        service = QueryService()
+        
+        terms, symbols = service.candidate_filter("HDFC Bank news")
+        
+        assert 'HDFCBANK' in symbols
+        assert any('hdfc' in term.lower() for term in terms)
+        assert service.candidate_filter("Interest rate impact") is None
+
 
+
+class TestArticleIndex:
+    """Tests for the article token index."""
+    
+    def test_find_matches_substring_search(self):
+        """Test lookups agree with a case-insensitive substring scan."""
+        articles = [
+            {'id': 'N1', 'title': 'HDFC Bank dividend', 'content': 'HDFC Bank announced a dividend.'},
+            {'id': 'N2', 'title': 'Banking sector growth', 'content': 'The banking sector grew; L&T won orders.'},
+            {'id': 'N3', 'title': 'RBI policy', 'content': 'The RBI held rates.'}
+        ]
+        index = ArticleIndex()
+        index.sync(articles)
+        
+        for term in ['HDFC Bank', 'bank', 'anking sec', 'L&T', 'rbi', 'Infosys', ';']:
+            expected = {
+                a['id'] for a in articles
+                if term.lower() in f"{a['title']} {a['content']}".lower()
+            }
+            assert index.find(term) == expected
+    
+    def test_sync_reindexes_changed_articles(self):
+        """Test an article whose text changes is re-indexed under its ID."""
+        index = ArticleIndex()
+        index.sync([{'id': 'N1', 'title': 'HDFC Bank dividend', 'content': ''}])
+        index.sync([{'id': 'N1', 'title': 'ICICI Bank expansion', 'content': ''}])
+        
+        assert index.find('HDFC') == set()
+        assert index.find('ICICI') == {'N1'}
+        assert len(index) == 1
+
+
+class TestEmbeddings:
+    """Tests for the embedding cache."""
+    
+    def test_get_embedding_model_loads_once_across_threads(self, monkeypatch):
+        """Test concurrent first calls share one model instead of each loading it."""
+        import threading
+        import time
+        import src.utils.embeddings as embeddings_module
+        
+        loaded = []
+        
+        def fake_model(*args, **kwargs):
+            time.sleep(0.05)
+            loaded.append(args)
+            return object()
+        
+        monkeypatch.setattr(embeddings_module, '_embedding_model', None)
+        monkeypatch.setattr(embeddings_module, 'SentenceTransformer', fake_model)
+        
+        models = []
+        threads = [
+            threading.Thread(target=lambda: models.append(embeddings_module.get_embedding_model()))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(loaded) == 1
+        assert all(model is models[0] for model in models)
+    
+    def test_get_embeddings_encodes_each_text_once(self, monkeypatch, tmp_path):
+        """Test repeated texts are served from the cache and the disk store."""
+        import numpy as np
+        from collections import OrderedDict
+        import src.utils.embeddings as embeddings_module
+        
+        encoded = []
+        
+        class FakeModel:
+            def encode(self, texts, **kwargs):
+                encoded.extend(texts)
+                return np.eye(4)[:len(texts)]
+        
+        monkeypatch.setattr(embeddings_module, '_embedding_model', FakeModel())
+        monkeypatch.setattr(embeddings_module, '_embedding_cache', OrderedDict())
+        monkeypatch.setattr(embeddings_module, '_embedding_store', None)
+        monkeypatch.setattr(embeddings_module, 'EMBEDDING_CACHE_PATH', str(tmp_path / 'embeddings.sqlite'))
+        
+        first = embeddings_module.get_embeddings(['RBI hikes rates', 'HDFC dividend', 'RBI hikes rates'])
+        embeddings_module._embedding_cache.clear()
+        second = embeddings_module.get_embeddings(['HDFC dividend', 'RBI hikes rates'])
+        
+        assert encoded == ['RBI hikes rates', 'HDFC dividend']
+        assert np.array_equal(first[0], first[2])
+        assert np.array_equal(second, first[[1, 0]])
+    
+    def test_find_similar_articles_ann_matches_exact(self, monkeypatch):
+        """Test the HNSW path returns what exact scoring returns."""
+        import numpy as np
+        from collections import OrderedDict
+        import src.utils.embeddings as embeddings_module
+        pytest.importorskip("faiss")
+        
+        vectors = np.random.default_rng(0).normal(size=(300, 16))
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        
+        class FakeModel:
+            def encode(self, texts, **kwargs):
+                return vectors[[int(text) for text in texts]]
+        
+        monkeypatch.setattr(embeddings_module, '_embedding_model', FakeModel())
+        monkeypatch.setattr(embeddings_module, '_embedding_cache', OrderedDict())
+        monkeypatch.setattr(embeddings_module, 'EMBEDDING_CACHE_PATH', '')
+        monkeypatch.setattr(embeddings_module, '_ann_index', None)
+        monkeypatch.setattr(embeddings_module, '_ann_keys', [])
+        texts = [str(i) for i in range(1, 300)]
+        
+        monkeypatch.setattr(embeddings_module, 'ANN_MIN_ARTICLES', 10**9)
+        exact = embeddings_module.find_similar_articles('0', texts, threshold=0.3)
+        monkeypatch.setattr(embeddings_module, 'ANN_MIN_ARTICLES', 1)
+        approximate = embeddings_module.find_similar_articles('0', texts, threshold=0.3)
+        
+        assert exact
+        assert [i for i, _ in approximate] == [i for i, _ in exact]
+        assert np.allclose([s for _, s in approximate], [s for _, s in exact], atol=1e-5)